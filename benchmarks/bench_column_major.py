@@ -0,0 +1,51 @@
+# Compare per-trace reductions on the interleaved (row-major) layout against
+# Spice.to_column_major() on a wide file.
+#   python -m benchmarks.bench_column_major [variable_num] [point_num]
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+from modules.spice import Spice
+from benchmarks.synthetic_raw import write_transient_raw
+
+
+def reduce_all(spice: Spice) -> float:
+    total = 0.0
+    for name in spice.variables[1:]:
+        data = spice.get_data(name)
+        total += np.max(data) - np.min(data) + np.sqrt(np.mean(np.square(data, dtype=np.float64)))
+    return total
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(variable_num: int = 400, point_num: int = 100000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_transient_raw(Path(tmp) / 'wide.raw', variable_num, point_num)
+
+        row_major = Spice(path).parse()
+        column_major = Spice(path).parse()
+        start = time.perf_counter()
+        column_major.to_column_major()
+        transpose = time.perf_counter() - start
+
+        strided = best_of(lambda: reduce_all(row_major))
+        contiguous = best_of(lambda: reduce_all(column_major))
+
+    print(f'{variable_num} variables x {point_num} points')
+    print(f'row-major reductions    : {strided * 1e3:8.1f} ms')
+    print(f'column-major reductions : {contiguous * 1e3:8.1f} ms  ({strided / contiguous:.1f}x)')
+    print(f'one-off transpose       : {transpose * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
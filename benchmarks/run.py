@@ -0,0 +1,199 @@
+"""Repeatable timing and peak-memory benchmarks for the .raw read path, per phase:
+read_header, parse (in-memory / memory_map / lazy), get_data over every trace and
+SpiceSim.measure / Spice.stream_statistics. Results can be saved as a baseline JSON and
+later runs compared against it; the exit status is 1 when a phase regressed.
+
+  python -m benchmarks.run                              # print results
+  python -m benchmarks.run --save benchmarks/baseline.json
+  python -m benchmarks.run --compare [other.json] [--time-tolerance 0.3]
+
+--compare defaults to the committed benchmarks/baseline.json. Times depend on the machine:
+re-save the baseline on the machine that runs the comparison before relying on timings.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+import numpy as np
+
+from modules._sim import SpiceSim
+from modules.constants import Output
+from modules.spice import Spice
+from benchmarks.synthetic_raw import write_raw
+
+default_baseline = Path(__file__).with_name('baseline.json')
+
+# name -> write_raw keyword arguments
+scenarios = {
+    'binary-utf16-f4': dict(variable_num=32, point_num=200000),
+    'binary-utf16-f8': dict(variable_num=32, point_num=200000, trace_dtype=np.float64),
+    'binary-utf8-f4': dict(variable_num=32, point_num=200000, encoding='utf-8'),
+    'binary-utf16-f4-stepped': dict(variable_num=32, point_num=20000, step_num=10),
+    'binary-wide': dict(variable_num=400, point_num=20000),
+    'binary-ac-complex': dict(variable_num=32, point_num=50000, mode='AC'),
+    'ascii-utf16': dict(variable_num=8, point_num=20000, file_type='Ascii'),
+    'ascii-utf8-ac': dict(variable_num=8, point_num=10000, file_type='Ascii', encoding='utf-8', mode='AC'),
+}
+
+
+def _time(fn: Callable, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {'best': min(timings), 'median': float(np.median(timings))}
+
+
+def _peak_memory(fn: Callable) -> int:
+    # numpy reports its buffers to tracemalloc, so this covers array allocations as well
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _phases(path: Path, mode: str, file_type: str) -> Dict[str, Callable]:
+    def get_data(**parse_options):
+        spice = Spice(path).parse(**parse_options)
+        for name in spice.variables[1:]:
+            spice.get_data(name)
+
+    phases = {
+        'read_header': lambda: Spice(path),
+        'parse': lambda: Spice(path).parse(),
+        'parse_memory_map': lambda: Spice(path).parse(memory_map=True),
+        'parse_lazy': lambda: Spice(path).parse(lazy=True),
+        'get_data': get_data,
+        'get_data_lazy': lambda: get_data(lazy=True),
+    }
+    if mode != 'AC':
+        def measure():
+            sim = SpiceSim(str(path))
+            sim.parse()
+            sim.measure(sim.variables[1:], output=Output.raw)
+
+        def stream_statistics():
+            spice = Spice(path)
+            spice.stream_statistics(spice.variables[1:])
+
+        phases['measure'] = measure
+        if file_type == 'Binary':
+            phases['stream_statistics'] = stream_statistics
+    return phases
+
+
+def run(names: List[str], repeat: int = 5, memory: bool = True) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            options = scenarios[name]
+            path = write_raw(Path(tmp) / f'{name}.raw', **options)
+            entry = {'file_bytes': path.stat().st_size, 'phases': {}}
+            for phase, fn in _phases(path, options.get('mode', 'Transient'),
+                                        options.get('file_type', 'Binary')).items():
+                try:
+                    fn()  # warm the page cache and imports
+                except Exception as e:
+                    entry['phases'][phase] = {'error': f'{type(e).__name__}: {e}'}
+                    continue
+                record = _time(fn, repeat)
+                if memory:
+                    record['peak_bytes'] = _peak_memory(fn)
+                entry['phases'][phase] = record
+            results[name] = entry
+            path.unlink()
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'scenarios': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, time_tolerance: float, memory_tolerance: float) -> List[str]:
+    # A phase regresses when its best time or peak memory exceeds the baseline by more than
+    # the tolerance (a fraction: 0.3 allows 30% slower). Missing baseline entries are skipped.
+    regressions = []
+    for name, entry in current['scenarios'].items():
+        base_phases = baseline.get('scenarios', {}).get(name, {}).get('phases', {})
+        for phase, record in entry['phases'].items():
+            base = base_phases.get(phase)
+            if base is None or 'error' in base:
+                continue
+            if 'error' in record:
+                regressions.append(f"{name}/{phase}: {record['error']}")
+                continue
+            if record['best'] > base['best'] * (1 + time_tolerance):
+                regressions.append(f"{name}/{phase}: time {base['best'] * 1e3:.2f} ms -> "
+                                   f"{record['best'] * 1e3:.2f} ms ({record['best'] / base['best']:.2f}x)")
+            if 'peak_bytes' in record and 'peak_bytes' in base and \
+                    record['peak_bytes'] > base['peak_bytes'] * (1 + memory_tolerance):
+                regressions.append(f"{name}/{phase}: peak memory {base['peak_bytes'] / 2**20:.1f} MiB -> "
+                                   f"{record['peak_bytes'] / 2**20:.1f} MiB")
+    return regressions
+
+
+def print_results(results: Dict, baseline: Dict = None):
+    for name, entry in results['scenarios'].items():
+        print(f"{name} ({entry['file_bytes'] / 2**20:.1f} MiB)")
+        base_phases = (baseline or {}).get('scenarios', {}).get(name, {}).get('phases', {})
+        for phase, record in entry['phases'].items():
+            if 'error' in record:
+                print(f"  {phase:<18} failed: {record['error']}")
+                continue
+            line = f"  {phase:<18} {record['best'] * 1e3:9.2f} ms  (median {record['median'] * 1e3:9.2f} ms)"
+            if 'peak_bytes' in record:
+                line += f"  peak {record['peak_bytes'] / 2**20:8.1f} MiB"
+            if 'best' in base_phases.get(phase, {}):
+                line += f"  {record['best'] / base_phases[phase]['best']:5.2f}x baseline"
+            print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', help=f"subset of: {', '.join(scenarios)}")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--save', type=Path, help='write the results as a baseline JSON')
+    parser.add_argument('--compare', type=Path, nargs='?', const=default_baseline,
+                        help=f'baseline JSON to check against (default: {default_baseline.name})')
+    parser.add_argument('--time-tolerance', type=float, default=0.3)
+    parser.add_argument('--memory-tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in scenarios]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = run(args.scenarios or list(scenarios), args.repeat, not args.no_memory)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_results(results, baseline)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+        print(f'baseline written to {args.save}')
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Literal, Union
+import numpy as np
+
+# Synthetic LTspice .raw writer for benchmarks. Covers the layouts Spice has to read:
+# binary and ASCII values, UTF-16-LE and UTF-8 headers, float32 ('real') or float64
+# ('real double') traces, real transient and complex AC data, and .step sweeps stored
+# back to back in one file.
+
+
+def _axis(mode: str, point_num: int, rng: np.random.Generator) -> np.ndarray:
+    if mode == 'AC':
+        return np.logspace(3, 7, point_num)
+    # adaptive-looking transient steps: many small steps mixed with a few large ones
+    steps = rng.gamma(0.5, 1.0, point_num - 1)
+    time = np.concatenate(([0.0], np.cumsum(steps)))
+    return time * (8e-3 / time[-1])
+
+
+def _traces(x: np.ndarray, variable_num: int, mode: str, rng: np.random.Generator) -> np.ndarray:
+    count = variable_num - 1
+    amplitude = rng.uniform(0.1, 10.0, count)
+    if mode == 'AC':
+        pole = rng.uniform(1e4, 1e6, count)
+        return amplitude[None, :] / (1 + 1j * x[:, None] / pole[None, :])
+    frequency = rng.uniform(1e3, 1e6, count)
+    offset = rng.uniform(-1.0, 1.0, count)
+    return offset[None, :] + amplitude[None, :] * np.sin(2 * np.pi * frequency[None, :] * x[:, None])
+
+
+def write_raw(path: Union[str, Path], variable_num: int = 8, point_num: int = 10000, step_num: int = 1,
+              file_type: Literal['Binary', 'Ascii'] = 'Binary',
+              encoding: Literal['utf-16-le', 'utf-8'] = 'utf-16-le',
+              trace_dtype=np.float32, mode: Literal['Transient', 'AC'] = 'Transient',
+              seed: int = 0) -> Path:
+    # point_num is per .step case; the file holds point_num * step_num rows
+    rng = np.random.default_rng(seed)
+    x = _axis(mode, point_num, rng)
+    cases = [_traces(x, variable_num, mode, rng) for _ in range(step_num)]
+    x_all = np.tile(x, step_num)
+    y_all = np.concatenate(cases)
+    total = point_num * step_num
+
+    if mode == 'AC':
+        flags = 'complex forward log'
+        plot_name = 'AC Analysis'
+        x_name, x_type = 'frequency', 'frequency'
+    else:
+        double = np.dtype(trace_dtype) == np.float64
+        flags = 'real forward' + (' double' if double else '')
+        plot_name = 'Transient Analysis'
+        x_name, x_type = 'time', 'time'
+
+    names = [x_name] + [f'V(n{i:03d})' for i in range(1, variable_num)]
+    header = (
+        "Title: * synthetic\n"
+        "Date: Mon May 19 09:32:15 2025\n"
+        f"Plotname: {plot_name}\n"
+        f"Flags: {flags}\n"
+        f"No. Variables: {variable_num}\n"
+        f"No. Points: {total:>12}\n"
+        "Offset:   0.0000000000000000e+000\n"
+        "Command: Linear Technology Corporation LTspice\n"
+        "Variables:\n"
+    )
+    for index, name in enumerate(names):
+        header += f"\t{index}\t{name}\t{x_type if index == 0 else 'voltage'}\n"
+    header += 'Binary:\n' if file_type == 'Binary' else 'Values:\n'
+
+    path = Path(path)
+    with open(path, 'wb') as f:
+        f.write(header.encode(encoding))
+        if file_type == 'Binary':
+            if mode == 'AC':
+                rows = np.empty((total, variable_num), dtype='<c16')
+                rows[:, 0] = x_all
+                rows[:, 1:] = y_all
+            else:
+                rows = np.empty(total, dtype=[('x', '<f8'), ('y', np.dtype(trace_dtype).newbyteorder('<'),
+                                                               (variable_num - 1,))])
+                rows['x'] = x_all
+                rows['y'] = y_all
+            rows.tofile(f)
+        else:
+            if mode == 'AC':
+                values = np.column_stack((x_all.astype(np.complex128), y_all))
+                cells = np.char.add(np.char.add(np.char.mod('%.15e', values.real), ','),
+                                    np.char.mod('%.15e', values.imag))
+            else:
+                cells = np.char.mod('%.15e', np.column_stack((x_all, y_all)))
+            lines = [f'{i}\t' + '\n\t'.join(row) + '\n' for i, row in enumerate(cells.tolist())]
+            f.write(''.join(lines).encode(encoding))
+    return path
+
+
+def write_transient_raw(path: Union[str, Path], variable_num: int = 8, point_num: int = 10000,
+                        seed: int = 0) -> Path:
+    # LTspice-style binary transient: UTF-16-LE header, double time column, float32 traces
+    return write_raw(path, variable_num, point_num, seed=seed)
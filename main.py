@@ -2,6 +2,7 @@ from modules.transformer import *
 from modules.spice import *
 from modules.base_classes import *
 import os
+import sys
 from tabulate import tabulate
 import numpy as np
 import matplotlib.pyplot as plt
@@ -9,7 +10,8 @@ import matplotlib.pyplot as plt
 raw_file_path_pc = r'C:\Users\eugene.dann\Documents\Development\circuit_development\circuit_sims\AM Circuits\Base Injected\Test AM curcuit\BaseInjectedAM.raw'
 raw_file_path_mac = r'circuit_sims/AM Circuits/Base Injected/Test AM curcuit/BaseInjectedAM.raw'
 
-sim_path = r'circuit_sims/AM Circuits/Base Injected/Test AM curcuit/BaseInjectedAM.raw'
+# python main.py [path/to/file.raw]; headless measurements: python -m modules measure file.raw
+sim_path = sys.argv[1] if len(sys.argv) > 1 else r'circuit_sims/AM Circuits/Base Injected/Test AM curcuit/BaseInjectedAM.raw'
 
 circuit = Spice(sim_path)
 circuit.parse()
@@ -0,0 +1,154 @@
+# Command line entry point for headless jobs:
+#   python -m modules measure file.raw --signals 'V(am)' 'V(n005, n003)' --readings peak,true_rms --json
+#   python -m modules info file.raw
+# Only numpy and the parsing/measurement modules are imported; matplotlib is never loaded.
+from __future__ import annotations
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+from modules import metric_notation as mn
+from modules.base_classes import BaseReadingTypes
+from modules.constants import Output
+from modules._sim import SpiceSim
+
+
+def _readings(text: str) -> List[BaseReadingTypes]:
+    readings = []
+    for name in (n.strip() for n in text.split(',')):
+        if name not in BaseReadingTypes.__members__:
+            raise argparse.ArgumentTypeError(
+                f"unknown reading '{name}' (choose from {', '.join(BaseReadingTypes.__members__)})")
+        readings.append(BaseReadingTypes[name])
+    return readings
+
+
+def _unit(signal_name: str) -> str:
+    try:
+        return SpiceSim._get_signal_type(signal_name)
+    except ValueError:
+        return ''
+
+
+def measure_records(file_path: str, signals, readings, cases=None, t_start=None, t_stop=None,
+                    stream: bool = False) -> List[Dict]:
+    # one record per (case, signal), shaped like batch_measure's: file, signal, case, a key per reading
+    sim = SpiceSim(file_path)
+    names = signals or sim.trace_names
+    if stream:
+        # one pass over the file collects every case; the requested ones are picked afterwards
+        statistics = sim.stream_statistics(names, t_start=t_start, t_stop=t_stop)
+        cases = range(len(statistics)) if cases is None else cases
+        for case in cases:
+            if not 0 <= case < len(statistics):
+                raise ValueError(f'case {case} out of range (the file has {len(statistics)})')
+        results = {case: {name: stats.readings(readings) for name, stats in statistics[case].items()}
+                   for case in cases}
+    else:
+        sim.parse(lazy=True)
+        cases = range(sim.case_count) if cases is None else cases
+        results = {case: sim.measure(names, readings, Output.raw, case, t_start, t_stop) for case in cases}
+
+    records = []
+    for case, values in results.items():
+        for name, reading_values in values.items():
+            record = {'file': file_path, 'signal': name, 'case': case}
+            record.update({reading.name: float(value) for reading, value in reading_values.items()})
+            records.append(record)
+    return records
+
+
+def _print_table(records: List[Dict], readings: List[BaseReadingTypes], show_file: bool):
+    headers = (['file'] if show_file else []) + ['signal', 'case'] + [r.name for r in readings]
+    rows = []
+    for record in records:
+        row = ([record['file']] if show_file else []) + [record['signal'], str(record['case'])]
+        row += [f"{mn.to_metric(record[r.name], 3)}{_unit(record['signal'])}" for r in readings]
+        rows.append(row)
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    for row in [headers, ['-' * w for w in widths]] + rows:
+        print('  '.join(str(cell).ljust(w) for cell, w in zip(row, widths)).rstrip())
+
+
+def measure_command(args) -> int:
+    readings = args.readings or list(BaseReadingTypes)
+    records, failed = [], 0
+    for file_path in args.files:
+        try:
+            records += measure_records(file_path, args.signals, readings, args.case,
+                                       args.t_start, args.t_stop, args.stream)
+        except Exception as e:
+            failed += 1
+            records.append({'file': file_path, 'error': f'{type(e).__name__}: {e}'})
+            if not args.json:
+                print(f'{file_path}: {type(e).__name__}: {e}', file=sys.stderr)
+
+    if args.json:
+        json.dump(records, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table([r for r in records if 'error' not in r], readings, len(args.files) > 1)
+    return 1 if failed else 0
+
+
+def info_command(args) -> int:
+    failed = 0
+    for file_path in args.files:
+        try:
+            sim = SpiceSim(file_path)
+        except Exception as e:
+            failed += 1
+            print(f'{file_path}: {type(e).__name__}: {e}', file=sys.stderr)
+            continue
+        info = {
+            'file': file_path,
+            'title': sim.title.strip(),
+            'plot_name': sim.plot_name.strip(),
+            'mode': sim._mode,
+            'file_type': sim._file_type,
+            'points': sim._point_num,
+            'variables': [{'name': n, 'type': t} for n, t in zip(sim._variables, sim._types)],
+        }
+        if args.json:
+            print(json.dumps(info))
+        else:
+            print(f"{file_path}: {info['plot_name']} ({info['mode']}, {info['file_type']}), {info['points']} points")
+            for variable in info['variables']:
+                print(f"  {variable['name']:<24} {variable['type']}")
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m modules', description='LTspice .raw file tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    measure = commands.add_parser('measure', help='readings of signals in one or more .raw files')
+    measure.add_argument('files', nargs='+')
+    measure.add_argument('--signals', nargs='+', metavar='NAME',
+                         help="signal names, e.g. 'V(am)' 'V(n005, n003)' (default: every trace)")
+    measure.add_argument('--readings', type=_readings,
+                         help=f"comma separated: {','.join(BaseReadingTypes.__members__)} (default: all)")
+    measure.add_argument('--case', type=int, action='append',
+                         help='.step case to measure, may be repeated (default: every case)')
+    measure.add_argument('--t-start', type=mn.from_metric, help="window start, e.g. '2m'")
+    measure.add_argument('--t-stop', type=mn.from_metric, help='window stop')
+    measure.add_argument('--stream', action='store_true',
+                         help='read in blocks without loading the file (binary files only)')
+    measure.add_argument('--json', action='store_true', help='print the records as JSON')
+    measure.set_defaults(handler=measure_command)
+
+    info = commands.add_parser('info', help='header summary of .raw files')
+    info.add_argument('files', nargs='+')
+    info.add_argument('--json', action='store_true', help='one JSON object per file')
+    info.set_defaults(handler=info_command)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
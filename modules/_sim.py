@@ -1,9 +1,13 @@
 from modules.transformer import *
 from modules._sim import *
-from ltspice import Ltspice
+from modules.base_classes import BaseReadingTypes
+from modules import measurements as meas
+from modules.measurements import TraceStatistics, reading_labels
+from modules import profiling
+from modules.spice import Spice
 import re
 
-class SpiceSim(Ltspice):       
+class SpiceSim(Spice):       
     def __init__(self, path: str):
         super().__init__(path)
         
@@ -15,11 +19,12 @@ class SpiceSim(Ltspice):
         signal_type = match.group(1)
         return 'A' if signal_type == 'I' else 'V'
 
-    def peak(self, signal_name: str, output: Output=Output.raw):
-        signal_data = self.get_data(signal_name)
-        
-        if signal_data is None:
-            raise ValueError(f"No data found for signal '{signal_name}'")
+    # The readings below take a signal name or a Signal, an optional .step case and an optional
+    # window: t_start/t_stop, or the last `periods` periods of `frequency` (meas.window_slice).
+    @profiling.instrument
+    def peak(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+             periods=None, frequency=None):
+        signal_name, signal_data = self._signal_data(signal_name, case, t_start, t_stop, periods, frequency)
         
         reading = np.max(np.abs(signal_data))
         measurement_type = 'Peak'
@@ -40,11 +45,10 @@ class SpiceSim(Ltspice):
         else:
             return reading
 
-    def peak_to_peak(self, signal_name: str, output: Output=Output.raw):
-        signal_data = self.sim.get_data(signal_name)
-        
-        if signal_data is None:
-            raise ValueError(f"No data found for signal '{signal_name}'")
+    @profiling.instrument
+    def peak_to_peak(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+                     periods=None, frequency=None):
+        signal_name, signal_data = self._signal_data(signal_name, case, t_start, t_stop, periods, frequency)
         
         reading = np.max(signal_data) -  np.min(signal_data)
         measurement_type = 'Peak to Peak'
@@ -65,11 +69,10 @@ class SpiceSim(Ltspice):
         else:
             return reading
 
-    def true_rms(self, signal_name: str, output: Output=Output.raw):
-        signal_data = self.sim.get_data(signal_name)
-        
-        if signal_data is None:
-            raise ValueError(f"No data found for signal '{signal_name}'")
+    @profiling.instrument
+    def true_rms(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+                 periods=None, frequency=None):
+        signal_name, signal_data = self._signal_data(signal_name, case, t_start, t_stop, periods, frequency)
         
         reading = np.sqrt(np.mean(signal_data**2))
         measurement_type = 'True RMS'
@@ -90,11 +93,10 @@ class SpiceSim(Ltspice):
         else:
             return reading
         
-    def peak_to_peak_rms(self, signal_name: str, output: Output=Output.raw):
-        signal_data = self.sim.get_data(signal_name)
-        
-        if signal_data is None:
-            raise ValueError(f"No data found for signal '{signal_name}'")
+    @profiling.instrument
+    def peak_to_peak_rms(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+                         periods=None, frequency=None):
+        signal_name, signal_data = self._signal_data(signal_name, case, t_start, t_stop, periods, frequency)
         
         peak_peak = np.max(signal_data) -  np.min(signal_data)
         reading = peak_peak / (2 * np.sqrt(2))
@@ -116,11 +118,10 @@ class SpiceSim(Ltspice):
         else:
             return reading
 
-    def peak_rms(self, signal_name: str, output: Output=Output.raw):
-        signal_data = self.sim.get_data(signal_name)
-        
-        if signal_data is None:
-            raise ValueError(f"No data found for signal '{signal_name}'")
+    @profiling.instrument
+    def peak_rms(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+                 periods=None, frequency=None):
+        signal_name, signal_data = self._signal_data(signal_name, case, t_start, t_stop, periods, frequency)
         
         peak = np.max(np.abs(signal_data))
         reading = peak / (np.sqrt(2))
@@ -142,11 +143,10 @@ class SpiceSim(Ltspice):
         else:
             return reading
 
-    def average(self, signal_name: str, output: Output=Output.raw):
-        signal_data = self.sim.get_data(signal_name)
-        
-        if signal_data is None:
-            raise ValueError(f"No data found for signal '{signal_name}'")
+    @profiling.instrument
+    def average(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+                periods=None, frequency=None):
+        signal_name, signal_data = self._signal_data(signal_name, case, t_start, t_stop, periods, frequency)
         
         reading = np.mean(signal_data)
         measurement_type = 'Average'
@@ -166,4 +166,107 @@ class SpiceSim(Ltspice):
             
         else:
             return reading
-        
\ No newline at end of file
+
+    def _output_reading(self, reading, label: str, unit: str, measurement_type: str, output: Output):
+        if output == Output.metric:
+            return mn.to_metric(reading)
+
+        elif output == Output.print:
+            value = mn.to_metric(reading, 2)
+            print(f'{label}: {value}{unit} {measurement_type}')
+
+        elif output == Output.table:
+            value = mn.to_metric(reading, 2)
+            return (label, f'{value}{unit}', measurement_type)
+
+        else:
+            return reading
+
+    def _signal_data(self, signal, case: int = 0, t_start=None, t_stop=None, periods=None, frequency=None,
+                     with_time: bool = False):
+        # (name, data) for a signal name or a Signal (e.g. Signal.window(...)), limited to the
+        # window if one is given; the slice is a view, nothing is copied. with_time=True returns
+        # (name, time, data).
+        if isinstance(signal, str):
+            signal_name, signal_data, time = signal, self.get_data(signal, case), None
+        else:
+            signal_name, signal_data, time = signal.name, signal.data, signal.time
+
+        if signal_data is None:
+            raise ValueError(f"No data found for signal '{signal_name}'")
+
+        if with_time or any(v is not None for v in (t_start, t_stop, periods, frequency)):
+            time = self.get_time(case) if time is None else time
+            window = meas.window_slice(time, t_start, t_stop, periods, frequency)
+            time, signal_data = time[window], signal_data[window]
+        if with_time:
+            return signal_name, time, signal_data
+        return signal_name, signal_data
+
+    def _power_traces(self, voltage, current, case: int = 0):
+        voltage_name, time, voltage_data = self._signal_data(voltage, case, with_time=True)
+        current_name, current_data = self._signal_data(current, case)
+        if len(current_data) != len(voltage_data):
+            raise ValueError(f"'{voltage_name}' and '{current_name}' do not share a time axis")
+        return f'{voltage_name}*{current_name}', time, voltage_data, current_data
+
+    # Time-weighted readings: trapezoidal integration over LTspice's non-uniform timestep axis,
+    # optionally restricted to a window (e.g. the settled part of a .TRAN run). The samples are
+    # not sliced here: the integrals interpolate the window edges between samples.
+    @profiling.instrument
+    def time_average(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+                     periods=None, frequency=None):
+        signal_name, time, signal_data = self._signal_data(signal_name, case, with_time=True)
+        reading = meas.time_average(time, signal_data, *meas.window_times(time, t_start, t_stop, periods, frequency))
+        return self._output_reading(reading, signal_name, self._get_signal_type(signal_name), 'Time Average', output)
+
+    @profiling.instrument
+    def time_rms(self, signal_name: str, output: Output=Output.raw, case: int = 0, t_start=None, t_stop=None,
+                 periods=None, frequency=None):
+        signal_name, time, signal_data = self._signal_data(signal_name, case, with_time=True)
+        reading = meas.time_rms(time, signal_data, *meas.window_times(time, t_start, t_stop, periods, frequency))
+        return self._output_reading(reading, signal_name, self._get_signal_type(signal_name), 'Time RMS', output)
+
+    @profiling.instrument
+    def average_power(self, voltage_name: str, current_name: str, output: Output=Output.raw, case: int = 0,
+                      t_start=None, t_stop=None, periods=None, frequency=None):
+        label, time, voltage, current = self._power_traces(voltage_name, current_name, case)
+        reading = meas.average_power(time, voltage, current, *meas.window_times(time, t_start, t_stop, periods, frequency))
+        return self._output_reading(reading, label, 'W', 'Average Power', output)
+
+    @profiling.instrument
+    def energy(self, voltage_name: str, current_name: str, output: Output=Output.raw, case: int = 0,
+               t_start=None, t_stop=None, periods=None, frequency=None):
+        label, time, voltage, current = self._power_traces(voltage_name, current_name, case)
+        reading = meas.energy(time, voltage, current, *meas.window_times(time, t_start, t_stop, periods, frequency))
+        return self._output_reading(reading, label, 'J', 'Energy', output)
+
+    @profiling.instrument
+    def measure(self, signals, readings=tuple(BaseReadingTypes), output: Output=Output.table,
+                case: int = 0, t_start=None, t_stop=None, periods=None, frequency=None):
+        # One blocked pass per trace feeds every requested reading, instead of one full pass
+        # (and temporaries) per reading as the individual methods above do.
+        readings = list(readings)
+        results = {}
+        for signal in signals:
+            signal_name, signal_data = self._signal_data(signal, case, t_start, t_stop, periods, frequency)
+            results[signal_name] = TraceStatistics.of(signal_data).readings(readings)
+
+        if output == Output.raw:
+            return results
+
+        elif output == Output.metric:
+            return {name: {reading: mn.to_metric(value) for reading, value in values.items()}
+                    for name, values in results.items()}
+
+        table = []
+        for signal_name, values in results.items():
+            signal_type = self._get_signal_type(signal_name)
+            for reading, value in values.items():
+                table.append((signal_name, f'{mn.to_metric(value, 2)}{signal_type}', reading_labels[reading]))
+
+        if output == Output.print:
+            for signal_name, value, measurement_type in table:
+                print(f'{signal_name}: {value} {measurement_type}')
+
+        return table
@@ -0,0 +1,107 @@
+from __future__ import annotations
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from modules import metric_notation as mn
+from modules.base_classes import BaseReadingTypes
+from modules.constants import Output
+from modules.measurements import TraceStatistics
+from modules.spice import Spice
+
+PathSpec = Union[str, Path, Iterable[Union[str, Path]]]
+
+
+def find_raw_files(source: PathSpec) -> List[Path]:
+    # a directory (searched recursively), a glob pattern, a single file, or a list of any of those
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.is_dir():
+            return sorted(path.rglob('*.raw'))
+        if path.is_file():
+            return [path]
+        return sorted(Path(p) for p in glob.glob(str(source), recursive=True))
+
+    files = []
+    for item in source:
+        files.extend(find_raw_files(item))
+    return files
+
+
+def measure_file(file_path: Union[str, Path], signals: Optional[List[str]] = None,
+                 readings: Iterable[BaseReadingTypes] = tuple(BaseReadingTypes)) -> List[Dict]:
+    # Runs in a worker process: only small records go back to the parent, never the traces.
+    readings = list(readings)
+    try:
+        spice = Spice(file_path).parse(lazy=True)
+        names = signals if signals is not None else spice.trace_names
+        records = []
+        for case in range(spice.case_count):
+            for name in names:
+                data = spice.get_data(name, case)
+                if data is None:
+                    raise ValueError(f"No data found for signal '{name}'")
+                record = {'file': str(file_path), 'signal': name, 'case': case}
+                record.update({reading.name: value
+                               for reading, value in TraceStatistics.of(data).readings(readings).items()})
+                record['error'] = None
+                records.append(record)
+        return records
+    except Exception as e:
+        return [{'file': str(file_path), 'signal': None, 'case': None, 'error': f'{type(e).__name__}: {e}'}]
+
+
+def _print_progress(done: int, total: int, file_path: str, failed: bool) -> None:
+    status = 'failed' if failed else 'ok'
+    print(f'[{done}/{total}] {status} {file_path}', file=sys.stderr)
+
+
+def batch_measure(source: PathSpec, signals: Optional[List[str]] = None,
+                  readings: Iterable[BaseReadingTypes] = tuple(BaseReadingTypes),
+                  max_workers: Optional[int] = None,
+                  progress: Union[bool, Callable[[int, int, str, bool], None]] = True,
+                  output: Output = Output.raw) -> List[Dict]:
+    # One record per (file, case, signal) with a column per reading. A file that fails to parse
+    # yields a single record with 'error' set instead of aborting the batch.
+    files = find_raw_files(source)
+    readings = list(readings)
+    report = _print_progress if progress is True else (progress or None)
+
+    results: Dict[str, List[Dict]] = {}
+    if max_workers == 1 or len(files) <= 1:
+        for done, file_path in enumerate(files, 1):
+            records = measure_file(file_path, signals, readings)
+            results[str(file_path)] = records
+            if report:
+                report(done, len(files), str(file_path), records[0]['error'] is not None if records else False)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            futures = {executor.submit(measure_file, file_path, signals, readings): str(file_path)
+                       for file_path in files}
+            for done, future in enumerate(as_completed(futures), 1):
+                file_path = futures[future]
+                try:
+                    records = future.result()
+                except Exception as e:  # worker died (e.g. out of memory)
+                    records = [{'file': file_path, 'signal': None, 'case': None,
+                                'error': f'{type(e).__name__}: {e}'}]
+                results[file_path] = records
+                if report:
+                    report(done, len(files), file_path, records[0]['error'] is not None if records else False)
+
+    # keep the input order regardless of completion order
+    table = [record for file_path in files for record in results[str(file_path)]]
+
+    if output in (Output.metric, Output.table, Output.print):
+        for record in table:
+            for reading in readings:
+                if record.get(reading.name) is not None:
+                    record[reading.name] = mn.to_metric(record[reading.name], 2)
+
+    if output == Output.print:
+        from tabulate import tabulate
+        print(tabulate(table, headers='keys'))
+    return table
@@ -0,0 +1,235 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+
+from .spice import LtspiceException, Spice
+from . import profiling
+
+# Columnar export of simulations for dashboards and data tools, and a reader that loads the
+# files back as a Spice with lazy per-trace access.
+#
+# Parquet (pyarrow): one row per point with a 'case' column and one column per variable (x
+#   included); complex variables become '<name>.re' / '<name>.im' pairs. Each chunk is one row
+#   group. The header state (title, date, plot name, flags, variables, _types, ...) is stored as
+#   JSON in the schema metadata and each field carries its LTspice type.
+# HDF5 (h5py): 'x' (points,), 'traces' (variables - 1, points) chunked one trace row at a time,
+#   'case_split_point', and the header JSON in the file attributes.
+#
+# An unparsed binary file is streamed with Spice.iter_blocks, so at most one chunk of samples
+# is in memory; parsed (or in-memory) data is sliced chunk by chunk. Both libraries are
+# optional and only imported here.
+
+COLUMNAR_FORMAT_VERSION = 1
+_metadata_key = b'circuit_calculator.header'
+_formats = {'.parquet': 'parquet', '.pq': 'parquet', '.h5': 'hdf5', '.hdf5': 'hdf5', '.hdf': 'hdf5'}
+
+
+def _format(path: Path, format: Optional[str]) -> str:
+    if format is not None:
+        if format not in ('parquet', 'hdf5'):
+            raise ValueError(f"format must be 'parquet' or 'hdf5', got '{format}'")
+        return format
+    if path.suffix.lower() not in _formats:
+        raise ValueError(f"Cannot infer the format of '{path.name}'; pass format='parquet' or 'hdf5'")
+    return _formats[path.suffix.lower()]
+
+
+def _import(module: str, purpose: str):
+    try:
+        return __import__(module, fromlist=['_'])
+    except ImportError as e:
+        raise ImportError(f"{purpose} needs the optional '{module.split('.')[0]}' package") from e
+
+
+def _trace_names(spice: Spice) -> List[Tuple[int, str]]:
+    # duplicate declarations resolve to the first one, as in get_data
+    return [(index, name) for index, name in enumerate(spice.variables)
+            if index > 0 and spice.variable_index(name) == index]
+
+
+def iter_chunks(spice: Spice, chunk_points: int = 1 << 16) -> Iterator[Tuple[int, np.ndarray, Dict[int, np.ndarray]]]:
+    # (case, x, {variable index: data}) with at most chunk_points rows, never spanning two cases
+    traces = _trace_names(spice)
+    if len(spice.x_raw) == 0 and spice._file_type == 'Binary' and spice.file_path is not None:
+        names = [name for _, name in traces]
+        for case, x, data in spice.iter_blocks(names, chunk_points):
+            yield case, x, {index: data[name] for index, name in traces}
+        return
+
+    spice._ensure_parsed()
+    for case in range(spice.case_count):
+        begin, end = spice._case_split_point[case], spice._case_split_point[case + 1]
+        for start in range(begin, end, chunk_points):
+            stop = min(start + chunk_points, end)
+            yield case, spice.x_raw[start:stop], {index: spice._column(index)[start:stop] for index, _ in traces}
+
+
+def _header(spice: Spice) -> str:
+    state = spice._header_state()
+    state['file_path'] = None if spice.file_path is None else str(spice.file_path)
+    state['format_version'] = COLUMNAR_FORMAT_VERSION
+    return json.dumps(state)
+
+
+@profiling.instrument
+def export(spice: Spice, path: Union[str, Path], format: Optional[str] = None, chunk_points: int = 1 << 16,
+           compression: Optional[str] = None) -> Path:
+    path = Path(path)
+    if _format(path, format) == 'parquet':
+        _export_parquet(spice, path, chunk_points, compression or 'zstd')
+    else:
+        _export_hdf5(spice, path, chunk_points, compression or 'gzip')
+    return path
+
+
+def _export_parquet(spice: Spice, path: Path, chunk_points: int, compression: str):
+    pa = _import('pyarrow', 'Parquet export')
+    pq = _import('pyarrow.parquet', 'Parquet export')
+    x_name = spice.variables[0]
+    types = spice._types
+
+    writer = None
+    try:
+        for case, x, data in iter_chunks(spice, chunk_points):
+            columns = {'case': np.full(len(x), case, dtype=np.int32)}
+            field_types = {'case': 'case'}
+            for index, values in [(0, x)] + list(data.items()):
+                name = x_name if index == 0 else spice.variables[index]
+                if np.iscomplexobj(values):
+                    columns[f'{name}.re'], columns[f'{name}.im'] = values.real, values.imag
+                    field_types[f'{name}.re'] = field_types[f'{name}.im'] = types[index]
+                else:
+                    columns[name] = values
+                    field_types[name] = types[index]
+
+            table = pa.table({name: np.ascontiguousarray(values) for name, values in columns.items()})
+            if writer is None:
+                schema = pa.schema([field.with_metadata({b'type': field_types[field.name].encode('utf8')})
+                                    for field in table.schema], metadata={_metadata_key: _header(spice).encode('utf8')})
+                writer = pq.ParquetWriter(str(path), schema, compression=compression)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise LtspiceException("Nothing to export: the simulation has no points")
+
+
+def _export_hdf5(spice: Spice, path: Path, chunk_points: int, compression: str):
+    h5py = _import('h5py', 'HDF5 export')
+    point_num = spice._point_num
+    traces = _trace_names(spice)
+    case_starts = [0]
+
+    with h5py.File(path, 'w') as f:
+        f.attrs['header'] = _header(spice)
+        x_store = traces_store = None
+        row = 0
+        for case, x, data in iter_chunks(spice, chunk_points):
+            if x_store is None:
+                # created from the first chunk: streaming may only then settle the trace dtype
+                chunk = (min(chunk_points, point_num),)
+                x_store = f.create_dataset('x', shape=(point_num,), dtype=x.dtype, chunks=chunk,
+                                           compression=compression)
+                trace_dtype = np.result_type(*[v.dtype for v in data.values()]) if data else x.dtype
+                traces_store = f.create_dataset('traces', shape=(len(traces), point_num), dtype=trace_dtype,
+                                                chunks=(1,) + chunk, compression=compression)
+                traces_store.attrs['variables'] = [name for _, name in traces]
+                traces_store.attrs['types'] = [spice._types[index] for index, _ in traces]
+                traces_store.attrs['columns'] = [index for index, _ in traces]
+            while len(case_starts) <= case:
+                case_starts.append(row)
+            end = row + len(x)
+            x_store[row:end] = x
+            if traces:
+                traces_store[:, row:end] = np.stack([data[index] for index, _ in traces])
+            row = end
+
+        if x_store is None:
+            raise LtspiceException("Nothing to export: the simulation has no points")
+        f.create_dataset('case_split_point', data=np.array(case_starts + [row], dtype=np.int64))
+
+
+# The trace stores below keep the path, not an open file: each read opens the file, reads its
+# columns and closes it again, so a Spice from read_columnar holds no handle between reads
+# (Spice caches every column it has read) and the file can be replaced or deleted meanwhile.
+
+class _ParquetTraces:
+    # trace store for Spice._raw_column: one Parquet column (or re/im pair) read per trace
+    def __init__(self, path: Path, names: List[str], complex_columns: set):
+        self._path = str(path)
+        self._names = names
+        self._complex = complex_columns
+
+    def _read_columns(self, columns: List[str]):
+        pq = _import('pyarrow.parquet', 'Parquet reading')
+        return pq.read_table(self._path, columns=columns)
+
+    def _read(self, name: str) -> np.ndarray:
+        if name in self._complex:
+            table = self._read_columns([f'{name}.re', f'{name}.im'])
+            return table.column(0).to_numpy() + 1j * table.column(1).to_numpy()
+        return self._read_columns([name]).column(0).to_numpy()
+
+    def __getitem__(self, trace: int) -> np.ndarray:
+        return self._read(self._names[trace + 1])
+
+
+class _Hdf5Traces:
+    # maps Spice column numbers (duplicates skipped on export) to rows of the 'traces' dataset
+    def __init__(self, path: Path, columns: List[int]):
+        self._path = path
+        self._rows = {column: row for row, column in enumerate(columns)}
+
+    def __getitem__(self, trace: int) -> np.ndarray:
+        h5py = _import('h5py', 'HDF5 reading')
+        with h5py.File(self._path, 'r') as f:
+            return f['traces'][self._rows[trace + 1]]
+
+
+def _restore(path: Path, header: str) -> Spice:
+    state = json.loads(header)
+    if state.get('format_version') != COLUMNAR_FORMAT_VERSION:
+        raise LtspiceException(f"Unsupported columnar format version in '{path}'")
+    spice = Spice._from_header_state(path, state)
+    # file_path is the export: the 'Columnar' file type keeps parse() and the .raw readers off
+    # it (iter_blocks serves the loaded columns). Columns are copied out on first use and
+    # cached, like parse(lazy=True).
+    spice._file_type = 'Columnar'
+    spice._lazy = True
+    spice._y_raw = None  # assembled from the columns if y_raw is read
+    return spice
+
+
+@profiling.instrument
+def read_columnar(path: Union[str, Path], format: Optional[str] = None) -> Spice:
+    # Spice over an exported file: x and the case split are loaded, traces are read on demand.
+    # The result is already parsed; do not call parse() on it.
+    path = Path(path)
+    if _format(path, format) == 'parquet':
+        pq = _import('pyarrow.parquet', 'Parquet reading')
+        schema = pq.read_schema(str(path))
+        metadata = schema.metadata or {}
+        if _metadata_key not in metadata:
+            raise LtspiceException(f"'{path}' was not written by Spice.export")
+        spice = _restore(path, metadata[_metadata_key].decode('utf8'))
+        complex_columns = {name for name in spice.variables if f'{name}.re' in schema.names}
+        traces = _ParquetTraces(path, spice.variables, complex_columns)
+        spice.x_raw = traces._read(spice.variables[0])
+        cases = traces._read_columns(['case']).column(0).to_numpy()
+        starts = np.flatnonzero(np.diff(cases)) + 1
+        spice._case_split_point = np.concatenate(([0], starts, [len(cases)])).astype(np.intp)
+        spice._column_major = traces
+    else:
+        h5py = _import('h5py', 'HDF5 reading')
+        with h5py.File(path, 'r') as f:
+            if 'header' not in f.attrs:
+                raise LtspiceException(f"'{path}' was not written by Spice.export")
+            spice = _restore(path, f.attrs['header'])
+            spice.x_raw = f['x'][:]
+            spice._case_split_point = f['case_split_point'][:].astype(np.intp)
+            columns = [int(c) for c in f['traces'].attrs['columns']]
+        spice._column_major = _Hdf5Traces(path, columns)
+    return spice
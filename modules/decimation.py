@@ -0,0 +1,73 @@
+from __future__ import annotations
+import numpy as np
+
+
+def minmax_indices(time: np.ndarray, data: np.ndarray, buckets: int, t_start=None, t_stop=None) -> np.ndarray:
+    # Indices of the min and max sample in each of `buckets` equal time spans of [t_start, t_stop]
+    # (one per pixel column), ascending, plus the sample either side of the span so the line
+    # runs off the edges. LTspice's timestep is non-uniform, so the spans are cut on the time
+    # axis: a burst of small steps around an edge gets no more columns than a slow stretch.
+    # Peaks and the envelope of a dense carrier survive because every column keeps its extremes.
+    t_start = time[0] if t_start is None else t_start
+    t_stop = time[-1] if t_stop is None else t_stop
+    low = int(np.searchsorted(time, t_start, side='left'))
+    high = int(np.searchsorted(time, t_stop, side='right'))
+    begin, end = max(low - 1, 0), min(high + 1, len(time))
+    if high - low <= 2 * buckets or buckets < 1:
+        return np.arange(begin, end)
+
+    # first sample of every pixel column; columns without a sample are dropped
+    starts = np.searchsorted(time, np.linspace(t_start, t_stop, buckets + 1)[:-1], side='left')
+    starts = np.unique(np.clip(starts, low, high))
+    starts = starts[starts < high] - low
+    visible = np.asarray(data[low:high])
+    lengths = np.diff(np.append(starts, high - low))
+    positions = np.arange(low, high)
+
+    parts = [np.array([begin])]
+    for reduce in (np.fmin, np.fmax):
+        extremes = np.repeat(reduce.reduceat(visible, starts), lengths)
+        # last sample of each column equal to its extreme; -1 where the column is all NaN
+        found = np.maximum.reduceat(np.where(visible == extremes, positions, -1), starts)
+        parts.append(found[found >= 0])
+    parts.append(np.array([end - 1]))
+
+    indices = np.concatenate(parts)
+    indices.sort()
+    return indices[np.concatenate(([True], indices[1:] != indices[:-1]))]
+
+
+class DecimatedLine:
+    # Keeps a matplotlib line decimated to roughly two points per horizontal pixel of its axes,
+    # re-decimating the visible range whenever the x limits change (zoom/pan).
+    def __init__(self, ax, time: np.ndarray, data: np.ndarray, **plot_kwargs):
+        self.ax = ax
+        self.time = time
+        self.data = data
+        self.points_drawn = 0
+        self.line, = ax.plot([], [], **plot_kwargs)
+        self.update()
+        self._callback = ax.callbacks.connect('xlim_changed', lambda _: self.update())
+
+    def __repr__(self):
+        return f"<DecimatedLine points_drawn={self.points_drawn} of {len(self.data)}>"
+
+    def _pixel_width(self) -> int:
+        return max(int(self.ax.bbox.width), 1)
+
+    def update(self, t_start=None, t_stop=None) -> int:
+        if t_start is None or t_stop is None:
+            if self.points_drawn:
+                t_start, t_stop = self.ax.get_xlim()
+            else:
+                t_start, t_stop = self.time[0], self.time[-1]
+
+        indices = minmax_indices(self.time, self.data, self._pixel_width(), t_start, t_stop)
+
+        first_draw = self.points_drawn == 0
+        self.line.set_data(self.time[indices], self.data[indices])
+        self.points_drawn = len(indices)
+        if first_draw:
+            self.ax.relim()
+            self.ax.autoscale_view()
+        return self.points_drawn
@@ -0,0 +1,103 @@
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from modules import metric_notation as mn
+from modules.spectrum import resample_uniform
+from modules.spice import Signal
+
+# Envelope detection and AM demodulation of transient traces. Everything works on a uniform
+# resampling of the LTspice time axis and returns Signal objects, so the results go straight
+# into SpiceSim.measure, plot_signals, Signal.plot and Signal.spectrum.
+
+
+def _uniform(signal: Signal, points: Optional[int]):
+    points = len(signal.time) if points is None else points
+    return resample_uniform(signal.time, signal.data, points)
+
+
+def _analytic(block: np.ndarray) -> np.ndarray:
+    # analytic signal x + j*H{x} via the FFT (same construction as scipy.signal.hilbert)
+    n = len(block)
+    gain = np.zeros(n)
+    gain[0] = 1
+    if n % 2 == 0:
+        gain[n // 2] = 1
+        gain[1:n // 2] = 2
+    else:
+        gain[1:(n + 1) // 2] = 2
+    return np.fft.ifft(np.fft.fft(block) * gain)
+
+
+def hilbert_envelope(signal: Signal, points: Optional[int] = None, block_points: int = 1 << 20,
+                     overlap: Optional[int] = None) -> Signal:
+    # |analytic signal|, computed in overlapping blocks so memory stays bounded on long traces;
+    # the overlap on each side is discarded to hide the FFT's wrap-around edge effects
+    time, data = _uniform(signal, points)
+    overlap = block_points // 8 if overlap is None else overlap
+    envelope = np.empty_like(data)
+    for begin in range(0, len(data), block_points):
+        end = min(begin + block_points, len(data))
+        lo, hi = max(begin - overlap, 0), min(end + overlap, len(data))
+        envelope[begin:end] = np.abs(_analytic(data[lo:hi]))[begin - lo:end - lo]
+    return Signal.from_arrays(f'{signal.name} envelope', time, envelope)
+
+
+def peak_hold_envelope(signal: Signal, carrier_frequency, points: Optional[int] = None) -> Signal:
+    # ideal peak detector: the largest sample within one carrier period centred on each sample
+    carrier_frequency = mn.from_metric(carrier_frequency)
+    time, data = _uniform(signal, points)
+    step = time[1] - time[0]
+    width = max(int(round(1.0 / (carrier_frequency * step))), 1)
+    padded = np.pad(data, (width // 2, width - 1 - width // 2), mode='edge')
+    envelope = sliding_window_view(padded, width).max(axis=1)
+    return Signal.from_arrays(f'{signal.name} peak hold', time, envelope)
+
+
+def lowpass_taps(cutoff: float, sample_rate: float, taps: int) -> np.ndarray:
+    # windowed-sinc FIR (Hamming), unity gain at DC
+    n = np.arange(taps) - (taps - 1) / 2
+    response = np.sinc(2 * cutoff / sample_rate * n) * np.hamming(taps)
+    return response / response.sum()
+
+
+def decimate(signal: Signal, factor: Optional[int] = None, bandwidth=20e3, taps_per_factor: int = 8) -> Signal:
+    # Low-pass to `bandwidth` and keep every factor-th sample. The FIR is only evaluated at the
+    # kept samples (a strided window view times the taps), so cost scales with the output.
+    bandwidth = mn.from_metric(bandwidth)
+    time = np.asarray(signal.time, dtype=np.float64)
+    data = np.asarray(signal.data, dtype=np.float64)
+    step = (time[-1] - time[0]) / (len(time) - 1)
+    if not np.allclose(np.diff(time), step, rtol=1e-6, atol=0):
+        time, data = resample_uniform(time, data, len(time))
+        step = time[1] - time[0]
+    sample_rate = 1.0 / step
+    if factor is None:
+        factor = max(int(sample_rate / (2.5 * bandwidth)), 1)
+    if factor == 1:
+        return Signal.from_arrays(signal.name, time, data)
+
+    taps = lowpass_taps(min(bandwidth, 0.4 * sample_rate / factor), sample_rate, taps_per_factor * factor + 1)
+    half = len(taps) // 2
+    padded = np.pad(data, (half, half), mode='edge')
+    filtered = sliding_window_view(padded, len(taps))[::factor] @ taps
+    return Signal.from_arrays(signal.name, time[::factor], filtered)
+
+
+def demodulate(signal: Signal, carrier_frequency=None, method: str = 'hilbert', bandwidth=20e3,
+               remove_dc: bool = True, points: Optional[int] = None) -> Signal:
+    # envelope detector followed by decimation to the audio band; remove_dc drops the carrier
+    # level so the result is the recovered modulation
+    if method == 'hilbert':
+        envelope = hilbert_envelope(signal, points)
+    elif method == 'peak':
+        if carrier_frequency is None:
+            raise ValueError("Peak-hold demodulation needs the carrier frequency")
+        envelope = peak_hold_envelope(signal, carrier_frequency, points)
+    else:
+        raise ValueError(f"Unknown demodulation method: '{method}'")
+
+    audio = decimate(envelope, bandwidth=bandwidth)
+    data = audio.data - np.mean(audio.data) if remove_dc else audio.data
+    return Signal.from_arrays(f'{signal.name} demodulated', audio.time, data)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, List, Optional
+import numpy as np
+from modules import metric_notation as mn
+
+# IEC 60063 preferred number series (one decade of mantissas)
+E12 = (1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2)
+E24 = (1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+       3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1)
+E96 = (1.00, 1.02, 1.05, 1.07, 1.10, 1.13, 1.15, 1.18, 1.21, 1.24, 1.27, 1.30,
+       1.33, 1.37, 1.40, 1.43, 1.47, 1.50, 1.54, 1.58, 1.62, 1.65, 1.69, 1.74,
+       1.78, 1.82, 1.87, 1.91, 1.96, 2.00, 2.05, 2.10, 2.15, 2.21, 2.26, 2.32,
+       2.37, 2.43, 2.49, 2.55, 2.61, 2.67, 2.74, 2.80, 2.87, 2.94, 3.01, 3.09,
+       3.16, 3.24, 3.32, 3.40, 3.48, 3.57, 3.65, 3.74, 3.83, 3.92, 4.02, 4.12,
+       4.22, 4.32, 4.42, 4.53, 4.64, 4.75, 4.87, 4.99, 5.11, 5.23, 5.36, 5.49,
+       5.62, 5.76, 5.90, 6.04, 6.19, 6.34, 6.49, 6.65, 6.81, 6.98, 7.15, 7.32,
+       7.50, 7.68, 7.87, 8.06, 8.25, 8.45, 8.66, 8.87, 9.09, 9.31, 9.53, 9.76)
+
+series_tables = {'E12': E12, 'E24': E24, 'E96': E96}
+
+# default part ranges
+inductor_range = (1e-9, 10e-3)
+capacitor_range = (1e-12, 100e-6)
+
+SINGLE, SUM, PRODUCT_OVER_SUM = 0, 1, 2
+
+
+@lru_cache(maxsize=None)
+def standard_values(series: str = 'E24', low: float = 1e-12, high: float = 1.0) -> np.ndarray:
+    decades = range(int(np.floor(np.log10(low))), int(np.ceil(np.log10(high))) + 1)
+    # built from decimal text so 4.7e-9 is exactly the float of '4.7e-9', not 4.7 * 1e-9
+    values = np.unique([float(f'{m}e{d}') for d in decades for m in series_tables[series.upper()]])
+    return values[(values >= low * (1 - 1e-9)) & (values <= high * (1 + 1e-9))]
+
+
+class ComponentSet:
+    # Every value buildable from one part or a pair of parts of a series, sorted by value so
+    # targets are found with a binary search. A pair either adds (parallel C, series L) or
+    # combines as product over sum (series C, parallel L). Pairs are limited to parts at most
+    # pair_ratio apart: a part under a tenth of its partner only trims it by <10%, which a pair
+    # of closer values also reaches. That keeps E96 over the default capacitor range at ~100k
+    # values instead of ~540k (tens of ms to build); component_set() builds each table once,
+    # on first use.
+    def __init__(self, kind: str, series: str = 'E24', low: float = None, high: float = None,
+                 pairs: bool = True, pair_ratio: float = 10.0):
+        if kind not in ('capacitor', 'inductor'):
+            raise ValueError(f"kind must be 'capacitor' or 'inductor', got '{kind}'")
+        default_low, default_high = capacitor_range if kind == 'capacitor' else inductor_range
+        self.kind = kind
+        self.series = series.upper()
+        parts = standard_values(self.series, low or default_low, high or default_high)
+
+        values, first, second, topology = [parts], [parts], [np.full(len(parts), np.nan)], [np.full(len(parts), SINGLE)]
+        if pairs:
+            # partners of part i: parts[i:last[i]], i.e. up to pair_ratio times its value
+            last = np.searchsorted(parts, parts * pair_ratio * (1 + 1e-9), side='right')
+            counts = last - np.arange(len(parts))
+            a_index = np.repeat(np.arange(len(parts)), counts)
+            b_index = np.arange(len(a_index)) - np.repeat(np.cumsum(counts) - counts, counts) + a_index
+            a, b = parts[a_index], parts[b_index]
+            values += [a + b, a * b / (a + b)]
+            first += [a, a]
+            second += [b, b]
+            topology += [np.full(len(a), SUM), np.full(len(a), PRODUCT_OVER_SUM)]
+
+        values = np.concatenate(values)
+        order = np.argsort(values, kind='stable')
+        # identical values: keep the simplest build (singles come first in the stable sort)
+        keep = np.concatenate(([True], values[order][1:] != values[order][:-1]))
+        order = order[keep]
+        self.values = values[order]
+        self.log_values = np.log(self.values)
+        self.first = np.concatenate(first)[order]
+        self.second = np.concatenate(second)[order]
+        self.topology = np.concatenate(topology)[order]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"<ComponentSet {self.kind} {self.series} values={len(self)}>"
+
+    def nearest(self, targets, k: int = 1) -> np.ndarray:
+        # (len(targets), k) indices of the k closest values in log (relative) distance
+        # (fewer columns if the set is smaller than k). The 2k candidates around the insertion
+        # point are shifted, not clipped, at the ends of the range so no index repeats.
+        log_targets = np.log(np.atleast_1d(np.asarray(targets, dtype=np.float64)))
+        position = np.searchsorted(self.log_values, log_targets)
+        width = min(2 * k, len(self))
+        start = np.clip(position - k, 0, len(self) - width)
+        window = start[:, None] + np.arange(width)[None, :]
+        distance = np.abs(self.log_values[window] - log_targets[:, None])
+        best = np.argsort(distance, axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(window, best, axis=1)
+
+    def describe(self, index: int) -> str:
+        unit = 'F' if self.kind == 'capacitor' else 'H'
+        first = f'{mn.to_metric(self.first[index], 2)}{unit}'
+        if self.topology[index] == SINGLE:
+            return first
+        second = f'{mn.to_metric(self.second[index], 2)}{unit}'
+        adds_in_parallel = self.kind == 'capacitor'
+        parallel = (self.topology[index] == SUM) == adds_in_parallel
+        return f"{first} {'parallel' if parallel else 'series'} {second}"
+
+
+@lru_cache(maxsize=16)
+def component_set(kind: str, series: str = 'E24', pairs: bool = True) -> ComponentSet:
+    return ComponentSet(kind, series, pairs=pairs)
+
+
+def search_lc(frequency, reactance=None, q: Optional[float] = None, resistance=None,
+              series: str = 'E24', k: int = 5, pairs: bool = True, inductance=None,
+              candidates: int = 64, part_penalty: float = 1e-4) -> List[Dict]:
+    # Top-k standard-part L/C combinations resonating at `frequency`. With a target reactance
+    # (or Q and the tank's parallel resistance, X = R/Q) candidates are also ranked by how
+    # close X_L comes; with `inductance` fixed only the capacitor is searched. Each extra part
+    # costs part_penalty (relative error) so simpler builds win near-ties.
+    f0 = mn.from_metric(frequency)
+    w0 = 2 * np.pi * f0
+    if q is not None:
+        if resistance is None:
+            raise ValueError("A target Q needs the tank resistance")
+        reactance = mn.from_metric(resistance) / q
+    x0 = None if reactance is None else mn.from_metric(reactance)
+
+    capacitors = component_set('capacitor', series, pairs)
+    if inductance is not None:
+        l_values = np.atleast_1d(mn.from_metric(inductance)).astype(np.float64)
+        l_labels = [f'{mn.to_metric(v, 2)}H' for v in l_values]
+        l_parts = np.zeros(len(l_values))
+    else:
+        inductors = component_set('inductor', series, pairs)
+        if x0 is not None:
+            l_index = inductors.nearest(x0 / w0, candidates)[0]
+        else:
+            l_index = np.arange(len(inductors))
+        l_values = inductors.values[l_index]
+        l_labels = l_index
+        l_parts = np.where(inductors.topology[l_index] == SINGLE, 1, 2)
+
+    # for every inductance, the k capacitances closest to 1 / (w0^2 L)
+    c_index = capacitors.nearest(1.0 / (w0 ** 2 * l_values), k)
+    l_grid = np.repeat(l_values, c_index.shape[1])
+    c_grid = capacitors.values[c_index.ravel()]
+    f_grid = 1.0 / (2 * np.pi * np.sqrt(l_grid * c_grid))
+    score = np.abs(np.log(f_grid / f0))
+    if x0 is not None:
+        score = score + np.abs(np.log(w0 * l_grid / x0))
+    c_parts = np.where(capacitors.topology[c_index.ravel()] == SINGLE, 1, 2)
+    score = score + part_penalty * (np.repeat(l_parts, c_index.shape[1]) + c_parts)
+
+    best = np.argsort(score, kind='stable')[:k]
+    results = []
+    for i in best:
+        l_row = i // c_index.shape[1]
+        label = l_labels[l_row]
+        results.append({
+            'inductance': float(l_grid[i]),
+            'inductor': label if isinstance(label, str) else inductors.describe(label),
+            'capacitance': float(c_grid[i]),
+            'capacitor': capacitors.describe(c_index.ravel()[i]),
+            'frequency': float(f_grid[i]),
+            'frequency_error': float(f_grid[i] / f0 - 1),
+            'reactance': float(w0 * l_grid[i]),
+        })
+    return results
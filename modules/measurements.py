@@ -0,0 +1,223 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+from modules.base_classes import BaseReadingTypes
+
+reading_labels = {
+    BaseReadingTypes.peak:     'Peak',
+    BaseReadingTypes.pkpk:     'Peak to Peak',
+    BaseReadingTypes.true_rms: 'True RMS',
+    BaseReadingTypes.pk_rms:   'Peak RMS',
+    BaseReadingTypes.pkpk_rms: 'Peak to Peak RMS',
+    BaseReadingTypes.average:  'Average',
+}
+
+
+class _CompensatedSum:
+    # Neumaier (improved Kahan) summation of per-block partial sums, which numpy already
+    # computes pairwise, so long streams of blocks do not drift
+    __slots__ = ('value', 'compensation')
+
+    def __init__(self):
+        self.value = 0.0
+        self.compensation = 0.0
+
+    def add(self, x: float) -> None:
+        total = self.value + x
+        if abs(self.value) >= abs(x):
+            self.compensation += (self.value - total) + x
+        else:
+            self.compensation += (x - total) + self.value
+        self.value = total
+
+    def __float__(self):
+        return self.value + self.compensation
+
+
+class TraceStatistics:
+    # Running min/max/sum/sum-of-squares over a trace fed in blocks. Each block is small enough
+    # to stay in cache, so all four statistics cost one pass over the trace in main memory and
+    # no full-length temporaries (like data**2) are allocated. When blocks come with their time
+    # axis, trapezoidal integrals of y and y**2 are accumulated too, carrying the last sample
+    # across block boundaries.
+    block_size: int = 1 << 16
+
+    def __init__(self):
+        self.count = 0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self._total = _CompensatedSum()
+        self._total_squares = _CompensatedSum()
+        self._integral = _CompensatedSum()
+        self._integral_squares = _CompensatedSum()
+        self.t_first = None
+        self._last = None  # (time, value) of the previous block's final sample
+
+    @property
+    def total(self) -> float:
+        return float(self._total)
+
+    @property
+    def total_squares(self) -> float:
+        return float(self._total_squares)
+
+    def update(self, block: np.ndarray, time: Optional[np.ndarray] = None) -> TraceStatistics:
+        if len(block) == 0:
+            return self
+        block = np.asarray(block, dtype=np.float64)
+        self.count += len(block)
+        self.minimum = min(self.minimum, float(block.min()))
+        self.maximum = max(self.maximum, float(block.max()))
+        self._total.add(float(np.add.reduce(block)))
+        self._total_squares.add(float(np.dot(block, block)))
+
+        if time is not None:
+            time = np.asarray(time, dtype=np.float64)
+            if self._last is not None:
+                time = np.concatenate(([self._last[0]], time))
+                block = np.concatenate(([self._last[1]], block))
+            else:
+                self.t_first = float(time[0])
+            dt = np.diff(time)
+            self._integral.add(0.5 * float(np.dot(dt, block[1:] + block[:-1])))
+            squares = block * block
+            self._integral_squares.add(0.5 * float(np.dot(dt, squares[1:] + squares[:-1])))
+            self._last = (float(time[-1]), float(block[-1]))
+        return self
+
+    @property
+    def duration(self) -> float:
+        if self._last is None:
+            return 0.0
+        return self._last[0] - self.t_first
+
+    def time_average(self) -> float:
+        if self.duration <= 0:
+            raise ValueError("No time span to average over")
+        return float(self._integral) / self.duration
+
+    def time_rms(self) -> float:
+        if self.duration <= 0:
+            raise ValueError("No time span to average over")
+        return float(np.sqrt(float(self._integral_squares) / self.duration))
+
+    @classmethod
+    def of(cls, data: np.ndarray) -> TraceStatistics:
+        stats = cls()
+        for begin in range(0, len(data), cls.block_size):
+            stats.update(data[begin:begin + cls.block_size])
+        return stats
+
+    def reading(self, reading: BaseReadingTypes) -> float:
+        if self.count == 0:
+            raise ValueError("No samples to measure")
+        peak = max(abs(self.minimum), abs(self.maximum))
+        peak_to_peak = self.maximum - self.minimum
+        if reading == BaseReadingTypes.peak:
+            return peak
+        if reading == BaseReadingTypes.pkpk:
+            return peak_to_peak
+        if reading == BaseReadingTypes.true_rms:
+            return float(np.sqrt(self.total_squares / self.count))
+        if reading == BaseReadingTypes.pk_rms:
+            return float(peak / np.sqrt(2))
+        if reading == BaseReadingTypes.pkpk_rms:
+            return float(peak_to_peak / (2 * np.sqrt(2)))
+        if reading == BaseReadingTypes.average:
+            return self.total / self.count
+        raise ValueError(f"Unsupported reading: {reading}")
+
+    def readings(self, readings: Iterable[BaseReadingTypes]) -> Dict[BaseReadingTypes, float]:
+        return {reading: self.reading(reading) for reading in readings}
+
+
+def window_bounds(time: np.ndarray, t_start: Optional[float] = None, t_stop: Optional[float] = None) -> Tuple[int, int]:
+    # sample index range [begin, end) with t_start <= time <= t_stop; time must be ascending
+    begin = 0 if t_start is None else int(np.searchsorted(time, t_start, side='left'))
+    end = len(time) if t_stop is None else int(np.searchsorted(time, t_stop, side='right'))
+    return begin, max(begin, end)
+
+
+def _trapezoid_blocks(time: np.ndarray, data: np.ndarray, square: bool, block_size: int) -> float:
+    total = 0.0
+    for begin in range(0, len(time) - 1, block_size):
+        # blocks overlap by one sample so every interval is counted exactly once
+        t = np.asarray(time[begin:begin + block_size + 1], dtype=np.float64)
+        y = np.asarray(data[begin:begin + block_size + 1], dtype=np.float64)
+        if square:
+            y = y * y
+        total += 0.5 * float(np.dot(np.diff(t), y[1:] + y[:-1]))
+    return total
+
+
+def time_integral(time: np.ndarray, data: np.ndarray, t_start: Optional[float] = None,
+                  t_stop: Optional[float] = None, square: bool = False,
+                  block_size: int = TraceStatistics.block_size) -> Tuple[float, float]:
+    # Trapezoidal integral of data (or data**2) over the adaptive LTspice time axis, with the
+    # window edges linearly interpolated. Returns (integral, duration).
+    time = np.asarray(time)
+    if len(time) < 2:
+        raise ValueError("At least two samples are needed to integrate over time")
+    t_start = float(time[0]) if t_start is None else max(float(t_start), float(time[0]))
+    t_stop = float(time[-1]) if t_stop is None else min(float(t_stop), float(time[-1]))
+    if t_stop <= t_start:
+        raise ValueError(f"Empty integration window: {t_start} .. {t_stop}")
+
+    begin, end = window_bounds(time, t_start, t_stop)
+    total = _trapezoid_blocks(time[begin:end], data[begin:end], square, block_size)
+
+    def edge(t_from, t_to):
+        y = np.interp([t_from, t_to], time, data)
+        if square:
+            y = y * y
+        return 0.5 * (t_to - t_from) * (y[0] + y[1])
+
+    if begin == end:
+        total += edge(t_start, t_stop)
+    else:
+        if t_start < time[begin]:
+            total += edge(t_start, float(time[begin]))
+        if time[end - 1] < t_stop:
+            total += edge(float(time[end - 1]), t_stop)
+    return total, t_stop - t_start
+
+
+def time_average(time, data, t_start=None, t_stop=None) -> float:
+    integral, duration = time_integral(time, data, t_start, t_stop)
+    return integral / duration
+
+
+def time_rms(time, data, t_start=None, t_stop=None) -> float:
+    integral, duration = time_integral(time, data, t_start, t_stop, square=True)
+    return float(np.sqrt(integral / duration))
+
+
+def energy(time, voltage, current, t_start=None, t_stop=None) -> float:
+    integral, _ = time_integral(time, np.multiply(voltage, current, dtype=np.float64), t_start, t_stop)
+    return integral
+
+
+def average_power(time, voltage, current, t_start=None, t_stop=None) -> float:
+    integral, duration = time_integral(time, np.multiply(voltage, current, dtype=np.float64), t_start, t_stop)
+    return integral / duration
+
+
+def window_times(time: np.ndarray, t_start: Optional[float] = None, t_stop: Optional[float] = None,
+                 periods: Optional[float] = None, frequency: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+    # periods/frequency selects the last N periods of f (ending at t_stop or the end of the run),
+    # e.g. the settled carrier cycles of a transient; returns (t_start, t_stop)
+    if periods is not None or frequency is not None:
+        if periods is None or frequency is None:
+            raise ValueError("periods and frequency must be given together")
+        if t_start is not None:
+            raise ValueError("t_start cannot be combined with periods/frequency")
+        end_time = float(time[-1]) if t_stop is None else float(t_stop)
+        t_start = end_time - float(periods) / float(frequency)
+    return t_start, t_stop
+
+
+def window_slice(time: np.ndarray, t_start: Optional[float] = None, t_stop: Optional[float] = None,
+                 periods: Optional[float] = None, frequency: Optional[float] = None) -> slice:
+    # samples inside the window (see window_times); slicing with the result never copies
+    begin, end = window_bounds(time, *window_times(time, t_start, t_stop, periods, frequency))
+    return slice(begin, end)
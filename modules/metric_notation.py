@@ -1,40 +1,54 @@
-import numpy as np
+import math
 import re
+from functools import lru_cache
+import numpy as np
 
-def from_metric(s):
-    multipliers = {
-        'y': 1e-24, 'z': 1e-21, 'a': 1e-18, 'f': 1e-15,
-        'p': 1e-12, 'n': 1e-9,  'u': 1e-6,  'µ': 1e-6,
-        'm': 1e-3,  '': 1,      'k': 1e3,   'K': 1e3,
-        'M': 1e6,   'G': 1e9,   'T': 1e12,  'P': 1e15,
-        'E': 1e18,  'Z': 1e21,  'Y': 1e24
-    }
+multipliers = {
+    'y': 1e-24, 'z': 1e-21, 'a': 1e-18, 'f': 1e-15,
+    'p': 1e-12, 'n': 1e-9,  'u': 1e-6,  'µ': 1e-6,
+    'm': 1e-3,  '': 1,      'k': 1e3,   'K': 1e3,
+    'M': 1e6,   'G': 1e9,   'T': 1e12,  'P': 1e15,
+    'E': 1e18,  'Z': 1e21,  'Y': 1e24
+}
 
-    # Handle native and numpy numeric types
-    if isinstance(s, (int, float, np.number)):
-        return float(s)
+prefixes = {
+    -24: 'y', -21: 'z', -18: 'a', -15: 'f',
+    -12: 'p', -9: 'n', -6: 'µ', -3: 'm',
+     0: '',   3: 'k',  6: 'M',  9: 'G',
+    12: 'T', 15: 'P', 18: 'E', 21: 'Z', 24: 'Y'
+}
 
+_metric_pattern = re.compile(r'(-?\d*\.?\d*)([a-zA-Zµ]?)')
+_prefix_table = np.array([prefixes[e] for e in range(-24, 25, 3)])
+
+@lru_cache(maxsize=4096)
+def _parse_metric_string(s):
     s = s.strip()
-    match = re.fullmatch(r'(-?\d*\.?\d*)([a-zA-Zµ]?)', s)
+    match = _metric_pattern.fullmatch(s)
     if not match:
         raise ValueError(f"Invalid metric string: '{s}'")
 
     num_str, prefix = match.groups()
     return float(num_str) * multipliers.get(prefix, 1)
 
+def from_metric(s):
+    # Handle native and numpy numeric types
+    if isinstance(s, (int, float, np.number)):
+        return float(s)
+
+    # Lists/arrays of numbers or metric strings broadcast through the calculators
+    if isinstance(s, (list, tuple, np.ndarray)):
+        return from_metric_array(s)
+
+    return _parse_metric_string(s)
+
 def to_metric(value, precision=2):
+    if isinstance(value, (list, tuple, np.ndarray)) and np.ndim(value) > 0:
+        return to_metric_array(value, precision)
+
     if value == 0:
         return f"0"
 
-    prefixes = {
-
-        -24: 'y', -21: 'z', -18: 'a', -15: 'f',
-        -12: 'p', -9: 'n', -6: 'µ', -3: 'm',
-         0: '',   3: 'k',  6: 'M',  9: 'G',
-        12: 'T', 15: 'P', 18: 'E', 21: 'Z', 24: 'Y'
-    }
-
-    import math
     exponent = int(math.floor(math.log10(abs(value)) // 3 * 3))
     exponent = max(min(exponent, 24), -24)  # Clamp within range
     scaled = value / (10 ** exponent)
@@ -42,8 +56,31 @@ def to_metric(value, precision=2):
 
     return f"{scaled:.{precision}f}{prefix}"
 
+def from_metric_array(values):
+    # Bulk from_metric: numeric arrays pass straight through; strings are parsed once per
+    # distinct value and scattered back, so '47k' repeated 10k times costs one parse.
+    array = np.asarray(values)
+    if array.dtype.kind in 'biuf':
+        return array.astype(np.float64)
+
+    flat = array.ravel()
+    unique, inverse = np.unique(flat.astype(str), return_inverse=True)
+    parsed = np.array([_parse_metric_string(s) for s in unique], dtype=np.float64)
+    return parsed[inverse].reshape(array.shape)
+
+def to_metric_array(values, precision=2):
+    # Bulk to_metric returning an array of strings with the same shape
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(values)
+    nonzero = magnitude > 0
+    exponent = np.zeros(values.shape, dtype=np.int64)
+    exponent[nonzero] = np.floor(np.log10(magnitude[nonzero]) // 3 * 3)
+    exponent = np.clip(exponent, -24, 24)
+
+    scaled = values / np.power(10.0, exponent)
+    formatted = np.char.add(np.char.mod(f'%.{precision}f', scaled), _prefix_table[(exponent + 24) // 3])
+    return np.where(nonzero, formatted, '0')
+
 def needs_conversion(s):
-    import re
     s = s.strip()
-    return bool(re.fullmatch(r'-?\d*\.?\d*[a-zA-Zµ]?', s)) and not s.replace('.', '', 1).lstrip('-').isdigit()
-
+    return bool(_metric_pattern.fullmatch(s)) and not s.replace('.', '', 1).lstrip('-').isdigit()
@@ -0,0 +1,543 @@
+from __future__ import annotations
+import ast
+import math
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from .spice import LtspiceException, Spice
+
+# Linear LTspice netlists (.net) and a modified nodal analysis (MNA) small-signal AC solver.
+#
+# The unknowns are the node voltages followed by one branch current per inductor and voltage
+# source (E/H included). Every element is stamped once into two sparse (COO) real matrices so
+# that the system at angular frequency w is
+#     (G + jw C) x = b
+# Inductors keep their branch current as an unknown (V = (Rser + jwL) I + jw M I_other), so
+# K statements with k = 1 (ideal coupling, singular inductance matrix) need no inversion.
+# Small systems are solved for a block of frequencies at a time with one batched
+# np.linalg.solve; large ones use scipy.sparse (imported only then) one frequency at a time.
+#
+# Supported: R, C, L (Rser/Rpar/Cpar), V and I sources (AC magnitude/phase), K, E, G, F, H and
+# .param / .ac directives. Semiconductors, behavioural sources and subcircuits have no linear
+# model here; ac(skip_unsupported=True) leaves them out (open circuit).
+
+
+class NetlistException(LtspiceException):
+    pass
+
+
+class UnsupportedElementException(NetlistException):
+    pass
+
+
+_spice_suffixes = {
+    't': 1e12, 'g': 1e9, 'meg': 1e6, 'k': 1e3, 'mil': 25.4e-6,
+    'm': 1e-3, 'u': 1e-6, 'µ': 1e-6, 'μ': 1e-6, 'n': 1e-9, 'p': 1e-12, 'f': 1e-15,
+}
+# SPICE numbers: 'm' is milli and 'meg' mega, trailing unit letters are ignored ('10uF'),
+# and the suffix may stand in for the decimal point ('4k7')
+_spice_number = re.compile(r'([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(meg|mil|[tgkmunpfµμ])?(\d*)[a-zΩ]*',
+                           re.IGNORECASE)
+_number_in_expression = re.compile(r'(?<![\w.])((?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(meg|mil|[tgkmunpfµμ])(\d*)[a-z]*',
+                                   re.IGNORECASE)
+_functions = {
+    'sqrt': math.sqrt, 'abs': abs, 'exp': math.exp, 'ln': math.log, 'log': math.log, 'log10': math.log10,
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan, 'atan': math.atan, 'min': min, 'max': max,
+    'pow': math.pow,
+}
+_constants = {'pi': math.pi, 'e': math.e}
+_operators = {
+    ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b, ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b, ast.Pow: lambda a, b: a ** b,
+    ast.USub: lambda a: -a, ast.UAdd: lambda a: a,
+}
+
+# default series resistance LTspice gives every inductor
+inductor_rser = 1e-3
+
+
+def parse_number(text: str) -> float:
+    match = _spice_number.fullmatch(text.strip())
+    if not match:
+        raise ValueError(f"Invalid SPICE number: '{text}'")
+    mantissa, suffix, fraction = match.groups()
+    if fraction:
+        mantissa = f'{mantissa}.{fraction}' if '.' not in mantissa else mantissa + fraction
+    return float(mantissa) * _spice_suffixes.get((suffix or '').lower(), 1.0)
+
+
+def _spice_numbers_to_python(expression: str) -> str:
+    def replace(match):
+        return repr(parse_number(match.group(0)))
+    return _number_in_expression.sub(replace, expression)
+
+
+class Element:
+    def __init__(self, name: str, nodes: List[str], value: Optional[str] = None,
+                 options: Optional[Dict[str, str]] = None, ac: Tuple[str, str] = ('0', '0'),
+                 controls: Optional[List[str]] = None, line: str = ''):
+        self.name = name
+        self.kind = name[0].upper()
+        self.nodes = nodes
+        self.value = value
+        self.options = options or {}
+        self.ac = ac
+        self.controls = controls or []
+        self.line = line
+
+    def __repr__(self):
+        return f"<Element {self.name} {' '.join(self.nodes)} {self.value}>"
+
+
+class Netlist:
+    ground = ('0', 'gnd')
+
+    def __init__(self, elements: List[Element], parameters: Optional[Dict[str, str]] = None,
+                 ac_command: Optional[List[str]] = None, title: str = ''):
+        self.elements = elements
+        self.parameters = parameters or {}
+        self.ac_command = ac_command
+        self.title = title
+        self._by_name = {element.name.lower(): element for element in elements}
+
+    def __repr__(self):
+        return f"<Netlist elements={len(self.elements)} nodes={len(self.nodes)}>"
+
+    def __getitem__(self, name: str) -> Element:
+        return self._by_name[name.lower()]
+
+    @classmethod
+    def read(cls, path: Union[str, Path]) -> Netlist:
+        content = Path(path).read_bytes()
+        encoding, bom_size = Spice._detect_encoding(content)
+        try:
+            text = content[bom_size:].decode(encoding)
+        except UnicodeDecodeError:
+            text = content[bom_size:].decode('latin-1')
+        netlist = cls.parse(text)
+        if not netlist.title:
+            netlist.title = Path(path).name
+        return netlist
+
+    @classmethod
+    def parse(cls, text: str) -> Netlist:
+        lines = []
+        for raw_line in text.splitlines():
+            line = raw_line.split(';', 1)[0].strip()
+            if not line or line.startswith('*'):
+                continue
+            if line.startswith('+') and lines:
+                lines[-1] += ' ' + line[1:].strip()
+            else:
+                lines.append(line)
+
+        title = text.lstrip().splitlines()[0].lstrip('* ').strip() if text.strip().startswith('*') else ''
+        elements, parameters, ac_command = [], {}, None
+        for line in lines:
+            if line.startswith('.'):
+                directive, _, rest = line.partition(' ')
+                directive = directive.lower()
+                if directive == '.param':
+                    parameters.update(_assignments(rest))
+                elif directive == '.ac':
+                    ac_command = rest.split()
+                elif directive == '.end':
+                    break
+                continue
+            elements.append(_parse_element(line))
+        return cls(elements, parameters, ac_command, title)
+
+    @property
+    def nodes(self) -> List[str]:
+        # nodes of the elements with a linear model, in order of first use
+        seen = {}
+        for element in self.elements:
+            if element.kind not in 'RCLVIEGFH':
+                continue
+            for node in element.nodes:
+                if node.lower() not in self.ground:
+                    seen.setdefault(node.lower(), None)
+        return list(seen)
+
+    def evaluate(self, value: str, parameters: Optional[Dict[str, object]] = None) -> float:
+        # numbers, {expressions} and bare parameter names; parameters may refer to each other
+        scope = {name.lower(): v for name, v in self.parameters.items()}
+        scope.update({name.lower(): v for name, v in (parameters or {}).items()})
+        return _evaluate(value, scope, ())
+
+    def frequencies(self) -> np.ndarray:
+        # sweep points of the netlist's .ac directive (lin / dec / oct / list)
+        if not self.ac_command:
+            raise NetlistException("No .ac directive in the netlist; pass the frequencies explicitly")
+        kind = self.ac_command[0].lower()
+        values = [self.evaluate(v) for v in self.ac_command[1:]]
+        if kind == 'list':
+            return np.asarray(values)
+        points, start, stop = int(values[0]), values[1], values[2]
+        if kind == 'lin':
+            return np.linspace(start, stop, points)
+        if kind in ('dec', 'oct'):
+            base = 10.0 if kind == 'dec' else 2.0
+            count = int(math.floor(math.log(stop / start, base) * points + 1e-9)) + 1
+            return start * base ** (np.arange(count) / points)
+        raise NetlistException(f"Unknown .ac sweep type: '{kind}'")
+
+    def mna(self, parameters: Optional[Dict[str, object]] = None, sources: Optional[Dict[str, object]] = None,
+            skip_unsupported: bool = False, gmin: float = 1e-12) -> MnaSystem:
+        return MnaSystem(self, parameters, sources, skip_unsupported, gmin)
+
+    def ac(self, frequencies=None, sources: Optional[Dict[str, object]] = None,
+           parameters: Optional[Dict[str, object]] = None, steps: Optional[Sequence[Dict[str, object]]] = None,
+           skip_unsupported: bool = False, gmin: float = 1e-12) -> Spice:
+        # AC sweep returned as an in-memory Spice: get_data('V(out)'), get_frequency(), Signal, ...
+        # sources overrides AC stimuli, e.g. {'V2': 1} or {'V2': (1, 90)} (magnitude, phase in
+        # degrees); steps is a list of parameter overrides, one .step case each.
+        frequencies = self.frequencies() if frequencies is None else np.atleast_1d(np.asarray(frequencies, dtype=np.float64))
+        cases = [dict(parameters or {}, **step) for step in steps] if steps else [parameters]
+
+        systems = [self.mna(case, sources, skip_unsupported, gmin) for case in cases]
+        system = systems[0]
+        rows = np.concatenate([s.solve(frequencies)[:, s.output_columns] for s in systems])
+        x = np.tile(frequencies, len(systems)).astype(np.complex128)
+        y = np.column_stack((x, rows))
+        types = ['frequency'] + ['voltage'] * len(system.node_names) + ['device_current'] * len(system.branch_names)
+        return Spice.from_arrays(['frequency'] + system.output_names, types, x, y, 'AC', 'AC Analysis', self.title)
+
+
+def _assignments(text: str) -> Dict[str, str]:
+    # "a=1k b = {a*2}" or "a 1k" -> {'a': '1k', 'b': '{a*2}'}
+    text = re.sub(r'\s*=\s*', '=', text.strip())
+    tokens = _tokens(text)
+    if len(tokens) == 2 and '=' not in tokens[0]:
+        return {tokens[0]: tokens[1]}
+    result = {}
+    for token in tokens:
+        name, _, value = token.partition('=')
+        result[name] = value
+    return result
+
+
+def _tokens(text: str) -> List[str]:
+    # whitespace split that keeps {...} and (...) groups together
+    tokens, current, depth = [], '', 0
+    for char in text:
+        if char in '({':
+            depth += 1
+        elif char in ')}':
+            depth -= 1
+        if char.isspace() and depth == 0:
+            if current:
+                tokens.append(current)
+            current = ''
+        else:
+            current += char
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def _parse_element(line: str) -> Element:
+    tokens = _tokens(re.sub(r'\s*=\s*', '=', line))
+    name, kind = tokens[0], tokens[0][0].upper()
+    options = {}
+    positional = []
+    for token in tokens[1:]:
+        key, equals, value = token.partition('=')
+        if equals and '(' not in key and '{' not in key:
+            options[key.lower()] = value
+        else:
+            positional.append(token)
+
+    if kind in 'RCL':
+        return Element(name, positional[:2], positional[2] if len(positional) > 2 else options.get(kind.lower()),
+                       options, line=line)
+    if kind in 'VI':
+        value, ac = '0', ('0', '0')
+        rest = positional[2:]
+        i = 0
+        while i < len(rest):
+            word = rest[i].lower()
+            if word == 'ac':
+                # AC [magnitude [phase]]
+                values = []
+                i += 1
+                while i < len(rest) and len(values) < 2 and _is_value(rest[i]):
+                    values.append(rest[i])
+                    i += 1
+                ac = (values[0] if values else '1', values[1] if len(values) > 1 else '0')
+                continue
+            if word == 'dc' and i + 1 < len(rest):
+                value = rest[i + 1]
+                i += 2
+                continue
+            if _is_value(rest[i]):
+                value = rest[i]
+            i += 1
+        return Element(name, positional[:2], value, options, ac, line=line)
+    if kind == 'K':
+        return Element(name, [], positional[-1], options, controls=positional[:-1], line=line)
+    if kind in 'EG':
+        return Element(name, positional[:4], positional[4] if len(positional) > 4 else None, options, line=line)
+    if kind in 'FH':
+        return Element(name, positional[:2], positional[3] if len(positional) > 3 else None, options,
+                       controls=positional[2:3], line=line)
+    # semiconductors, behavioural sources, subcircuits: kept so ac() can report them
+    return Element(name, positional, None, options, line=line)
+
+
+def _is_value(token: str) -> bool:
+    return token.startswith('{') or bool(_spice_number.fullmatch(token))
+
+
+def _evaluate(value, scope: Dict[str, object], stack: Tuple[str, ...]) -> float:
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    text = str(value).strip()
+    if text.startswith('{') and text.endswith('}'):
+        text = text[1:-1]
+    elif _spice_number.fullmatch(text):
+        return parse_number(text)
+    try:
+        tree = ast.parse(_spice_numbers_to_python(text), mode='eval')
+    except SyntaxError:
+        raise NetlistException(f"Invalid expression: '{value}'")
+    return float(_evaluate_node(tree.body, scope, stack, value))
+
+
+def _evaluate_node(node, scope, stack, source):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _operators:
+        return _operators[type(node.op)](_evaluate_node(node.left, scope, stack, source),
+                                         _evaluate_node(node.right, scope, stack, source))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _operators:
+        return _operators[type(node.op)](_evaluate_node(node.operand, scope, stack, source))
+    if isinstance(node, ast.Name):
+        name = node.id.lower()
+        if name in scope:
+            if name in stack:
+                raise NetlistException(f"Recursive parameter: '{name}'")
+            return _evaluate(scope[name], scope, stack + (name,))
+        if name in _constants:
+            return _constants[name]
+        raise NetlistException(f"Undefined parameter '{node.id}' in '{source}'")
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id.lower() in _functions:
+        return _functions[node.func.id.lower()](*[_evaluate_node(a, scope, stack, source) for a in node.args])
+    raise NetlistException(f"Unsupported expression: '{source}'")
+
+
+class MnaSystem:
+    # G and C are real (size, size) matrices stored as COO triplets; b is the complex AC stimulus
+    dense_limit = 400                 # unknowns up to which the batched dense solver is used
+    dense_block_bytes = 64 * 1024 ** 2
+
+    def __init__(self, netlist: Netlist, parameters=None, sources=None, skip_unsupported: bool = False,
+                 gmin: float = 1e-12):
+        self.netlist = netlist
+        self.skipped = [e.name for e in netlist.elements if e.kind not in 'RCLVIKEGFH']
+        if self.skipped and not skip_unsupported:
+            raise UnsupportedElementException(
+                f"No linear AC model for {', '.join(self.skipped)} (use skip_unsupported=True to leave them open)")
+
+        value = lambda text: netlist.evaluate(text, parameters)
+        overrides = {name.lower(): stimulus for name, stimulus in (sources or {}).items()}
+        for name in overrides:
+            if name not in netlist._by_name or netlist[name].kind not in 'VI':
+                raise NetlistException(f"No voltage or current source named '{name}'")
+
+        self._nodes: Dict[str, int] = {}
+        self._internal = set()
+        branches = [e for e in netlist.elements if e.kind in 'LVEH']
+        for node in netlist.nodes:
+            self._nodes[node] = len(self._nodes)
+        for element in netlist.elements:
+            needs_internal = (element.kind == 'C' and 'rser' in element.options)
+            if needs_internal:
+                internal = f'{element.name.lower()}#rser'
+                self._nodes[internal] = len(self._nodes)
+                self._internal.add(internal)
+
+        node_count = len(self._nodes)
+        self._branch = {e.name.lower(): node_count + i for i, e in enumerate(branches)}
+        self.size = node_count + len(branches)
+        self.node_names = [n for n in self._nodes if n not in self._internal]
+        self.branch_names = [e.name for e in branches]
+
+        g_rows, g_cols, g_values = [], [], []
+        c_rows, c_cols, c_values = [], [], []
+        b = np.zeros(self.size, dtype=np.complex128)
+
+        def stamp(rows, cols, values, i, j, v):
+            if i >= 0 and j >= 0:
+                rows.append(i)
+                cols.append(j)
+                values.append(v)
+
+        def admittance(rows, cols, values, a, c, v):
+            stamp(rows, cols, values, a, a, v)
+            stamp(rows, cols, values, c, c, v)
+            stamp(rows, cols, values, a, c, -v)
+            stamp(rows, cols, values, c, a, -v)
+
+        def incidence(k, a, c):
+            stamp(g_rows, g_cols, g_values, a, k, 1.0)
+            stamp(g_rows, g_cols, g_values, c, k, -1.0)
+            stamp(g_rows, g_cols, g_values, k, a, 1.0)
+            stamp(g_rows, g_cols, g_values, k, c, -1.0)
+
+        def stimulus(element):
+            override = overrides.get(element.name.lower())
+            if override is None:
+                magnitude, phase = value(element.ac[0]), value(element.ac[1])
+            elif isinstance(override, (tuple, list)):
+                magnitude, phase = value(override[0]), value(override[1])
+            else:
+                return complex(override)
+            return magnitude * np.exp(1j * np.deg2rad(phase))
+
+        inductance = {}
+        for element in netlist.elements:
+            kind = element.kind
+            if kind not in 'RCLVIKEGFH':
+                continue
+            if kind != 'K':
+                a, c = (self.node(n) for n in element.nodes[:2])
+            if kind == 'R':
+                admittance(g_rows, g_cols, g_values, a, c, 1.0 / value(element.value))
+            elif kind == 'C':
+                capacitance = value(element.value)
+                if 'rser' in element.options:
+                    internal = self._nodes[f'{element.name.lower()}#rser']
+                    admittance(g_rows, g_cols, g_values, a, internal, 1.0 / value(element.options['rser']))
+                    a = internal
+                admittance(c_rows, c_cols, c_values, a, c, capacitance)
+                if 'rpar' in element.options:
+                    admittance(g_rows, g_cols, g_values, a, c, 1.0 / value(element.options['rpar']))
+            elif kind == 'L':
+                k = self._branch[element.name.lower()]
+                inductance[element.name.lower()] = value(element.value)
+                incidence(k, a, c)
+                stamp(c_rows, c_cols, c_values, k, k, -inductance[element.name.lower()])
+                rser = value(element.options['rser']) if 'rser' in element.options else inductor_rser
+                stamp(g_rows, g_cols, g_values, k, k, -rser)
+                if 'rpar' in element.options:
+                    admittance(g_rows, g_cols, g_values, a, c, 1.0 / value(element.options['rpar']))
+                if 'cpar' in element.options:
+                    admittance(c_rows, c_cols, c_values, a, c, value(element.options['cpar']))
+            elif kind == 'V':
+                k = self._branch[element.name.lower()]
+                incidence(k, a, c)
+                if 'rser' in element.options:
+                    stamp(g_rows, g_cols, g_values, k, k, -value(element.options['rser']))
+                b[k] = stimulus(element)
+            elif kind == 'I':
+                current = stimulus(element)
+                if a >= 0:
+                    b[a] -= current
+                if c >= 0:
+                    b[c] += current
+            elif kind == 'E':
+                k = self._branch[element.name.lower()]
+                p, n = (self.node(x) for x in element.nodes[2:4])
+                gain = value(element.value)
+                incidence(k, a, c)
+                stamp(g_rows, g_cols, g_values, k, p, -gain)
+                stamp(g_rows, g_cols, g_values, k, n, gain)
+            elif kind == 'G':
+                p, n = (self.node(x) for x in element.nodes[2:4])
+                gm = value(element.value)
+                for row, sign in ((a, 1.0), (c, -1.0)):
+                    stamp(g_rows, g_cols, g_values, row, p, sign * gm)
+                    stamp(g_rows, g_cols, g_values, row, n, -sign * gm)
+            elif kind in 'FH':
+                control = self._control_branch(element)
+                gain = value(element.value)
+                if kind == 'F':
+                    stamp(g_rows, g_cols, g_values, a, control, gain)
+                    stamp(g_rows, g_cols, g_values, c, control, -gain)
+                else:
+                    k = self._branch[element.name.lower()]
+                    incidence(k, a, c)
+                    stamp(g_rows, g_cols, g_values, k, control, -gain)
+
+        # mutual inductance M = k sqrt(L1 L2) between every pair named in a K statement
+        for element in netlist.elements:
+            if element.kind != 'K':
+                continue
+            coupling = value(element.value)
+            names = [name.lower() for name in element.controls]
+            missing = [name for name in names if name not in inductance]
+            if missing:
+                raise NetlistException(f"{element.name} couples unknown inductor(s): {', '.join(missing)}")
+            for i, first in enumerate(names):
+                for second in names[i + 1:]:
+                    mutual = coupling * math.sqrt(inductance[first] * inductance[second])
+                    stamp(c_rows, c_cols, c_values, self._branch[first], self._branch[second], -mutual)
+                    stamp(c_rows, c_cols, c_values, self._branch[second], self._branch[first], -mutual)
+
+        # gmin from every node to ground keeps floating nodes (and f = 0) solvable
+        for index in range(node_count):
+            stamp(g_rows, g_cols, g_values, index, index, gmin)
+
+        self.g = (np.asarray(g_rows, dtype=np.intp), np.asarray(g_cols, dtype=np.intp), np.asarray(g_values))
+        self.c = (np.asarray(c_rows, dtype=np.intp), np.asarray(c_cols, dtype=np.intp), np.asarray(c_values))
+        self.b = b
+        self.output_names = [f'V({n})' for n in self.node_names] + [f'I({n})' for n in self.branch_names]
+        self.output_columns = np.array([self._nodes[n] for n in self.node_names] +
+                                       [self._branch[n.lower()] for n in self.branch_names], dtype=np.intp)
+
+    def __repr__(self):
+        return f"<MnaSystem unknowns={self.size} nonzeros={len(self.g[0]) + len(self.c[0])}>"
+
+    def node(self, name: str) -> int:
+        # matrix row of a node, -1 for ground
+        name = name.lower()
+        return -1 if name in Netlist.ground else self._nodes[name]
+
+    def _control_branch(self, element: Element) -> int:
+        name = element.controls[0].lower() if element.controls else ''
+        if name not in self._branch:
+            raise NetlistException(f"{element.name}: controlling current must be through a voltage source "
+                                   f"or inductor, got '{name}'")
+        return self._branch[name]
+
+    def dense(self) -> Tuple[np.ndarray, np.ndarray]:
+        g = np.zeros((self.size, self.size))
+        c = np.zeros((self.size, self.size))
+        np.add.at(g, self.g[:2], self.g[2])
+        np.add.at(c, self.c[:2], self.c[2])
+        return g, c
+
+    def solve(self, frequencies) -> np.ndarray:
+        # (len(frequencies), size) complex solution vectors
+        frequencies = np.atleast_1d(np.asarray(frequencies, dtype=np.float64))
+        omega = 2 * np.pi * frequencies
+        if self.size > self.dense_limit:
+            try:
+                return self._solve_sparse(omega)
+            except ImportError:
+                pass
+        return self._solve_dense(omega)
+
+    def _solve_dense(self, omega: np.ndarray) -> np.ndarray:
+        g, c = self.dense()
+        result = np.empty((len(omega), self.size), dtype=np.complex128)
+        block = max(1, self.dense_block_bytes // (16 * self.size * self.size))
+        for begin in range(0, len(omega), block):
+            w = omega[begin:begin + block]
+            matrices = g[None, :, :] + 1j * w[:, None, None] * c[None, :, :]
+            rhs = np.broadcast_to(self.b, (len(w), self.size))[..., None]
+            result[begin:begin + block] = np.linalg.solve(matrices, rhs)[..., 0]
+        return result
+
+    def _solve_sparse(self, omega: np.ndarray) -> np.ndarray:
+        from scipy import sparse
+        from scipy.sparse.linalg import splu
+        g = sparse.csc_matrix((self.g[2], self.g[:2]), shape=(self.size, self.size))
+        c = sparse.csc_matrix((self.c[2], self.c[:2]), shape=(self.size, self.size))
+        result = np.empty((len(omega), self.size), dtype=np.complex128)
+        for i, w in enumerate(omega):
+            result[i] = splu((g + 1j * w * c).tocsc()).solve(self.b)
+        return result
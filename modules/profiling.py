@@ -0,0 +1,266 @@
+from __future__ import annotations
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Opt-in instrumentation of the .raw pipeline. Spice and SpiceSim methods are wrapped with
+# @instrument and mark their inner phases (file read, decode, case split, ...) with phase();
+# read sites report bytes with bytes_read() and allocation sites report arrays with
+# allocated(). While profiling is off every hook is a flag test, so the cost is one attribute
+# lookup per call.
+#
+# Turn it on for a block of code:
+#     with profiling.profile() as report:
+#         Spice(path).parse()
+#     print(report.summary())
+# or for the whole process with CIRCUIT_CALCULATOR_PROFILE=1 (one-line summary on stderr at
+# exit) or CIRCUIT_CALCULATOR_PROFILE=report.json (the full report written at exit).
+#
+# The state is process-wide; worker processes (batch_measure) profile independently.
+
+PROFILE_ENV = 'CIRCUIT_CALCULATOR_PROFILE'
+max_calls = 10000  # per-call records kept per report; the per-phase totals are always complete
+
+
+class _Frame:
+    __slots__ = ('name', 'depth', 'start', 'bytes_read', 'arrays', 'array_bytes', 'memory_start', 'memory_peak')
+
+    def __init__(self, name: str, depth: int, memory: bool):
+        self.name = name
+        self.depth = depth
+        self.bytes_read = 0
+        self.arrays = 0
+        self.array_bytes = 0
+        if memory:
+            self.memory_start, self.memory_peak = tracemalloc.get_traced_memory()
+            self.memory_peak = self.memory_start
+        else:
+            self.memory_start = self.memory_peak = None
+        self.start = time.perf_counter()
+
+
+class ProfileReport:
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.calls: List[Dict] = []
+        self.phases: Dict[str, Dict] = {}
+        self.dropped_calls = 0
+        self.wall = 0.0
+        self._stack: List[_Frame] = []
+        self._started_tracemalloc = False
+        self._started = None
+
+    def __repr__(self):
+        return f"<ProfileReport phases={len(self.phases)} calls={len(self.calls) + self.dropped_calls}>"
+
+    def _start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._started = time.perf_counter()
+
+    def _stop(self):
+        self.wall += time.perf_counter() - self._started
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _enter(self, name: str):
+        if self.memory and self._stack:
+            # a child resets the tracemalloc peak, so fold the parent's peak so far in first
+            parent = self._stack[-1]
+            parent.memory_peak = max(parent.memory_peak, tracemalloc.get_traced_memory()[1])
+        frame = _Frame(name, len(self._stack), self.memory)
+        if self.memory:
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+
+    def _exit(self):
+        frame = self._stack.pop()
+        wall = time.perf_counter() - frame.start
+        record = {
+            'name': frame.name,
+            'depth': frame.depth,
+            'wall': wall,
+            'bytes_read': frame.bytes_read,
+            'arrays': frame.arrays,
+            'array_bytes': frame.array_bytes,
+        }
+        if self.memory:
+            frame.memory_peak = max(frame.memory_peak, tracemalloc.get_traced_memory()[1])
+            record['peak_bytes'] = frame.memory_peak - frame.memory_start
+
+        if self._stack:
+            parent = self._stack[-1]
+            parent.bytes_read += frame.bytes_read
+            parent.arrays += frame.arrays
+            parent.array_bytes += frame.array_bytes
+            if self.memory:
+                parent.memory_peak = max(parent.memory_peak, frame.memory_peak)
+
+        if len(self.calls) < max_calls:
+            self.calls.append(record)
+        else:
+            self.dropped_calls += 1
+
+        totals = self.phases.get(frame.name)
+        if totals is None:
+            totals = self.phases[frame.name] = {'calls': 0, 'depth': frame.depth, 'wall': 0.0, 'bytes_read': 0,
+                                                'arrays': 0, 'array_bytes': 0}
+            if self.memory:
+                totals['peak_bytes'] = 0
+        totals['calls'] += 1
+        totals['depth'] = min(totals['depth'], frame.depth)
+        totals['wall'] += wall
+        totals['bytes_read'] += frame.bytes_read
+        totals['arrays'] += frame.arrays
+        totals['array_bytes'] += frame.array_bytes
+        if self.memory:
+            totals['peak_bytes'] = max(totals['peak_bytes'], record['peak_bytes'])
+
+    def to_dict(self) -> Dict:
+        return {
+            'wall': self.wall,
+            'memory': self.memory,
+            'phases': self.phases,
+            'calls': self.calls,
+            'dropped_calls': self.dropped_calls,
+        }
+
+    def to_json(self, path: Optional[os.PathLike] = None, **kwargs) -> str:
+        text = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            Path(path).write_text(text)
+        return text
+
+    def summary(self) -> str:
+        # one line over the outermost calls only (nested phases are in to_dict()), e.g.
+        # "profile 12.3 ms | Spice.read_header 1x 0.2 ms | Spice.parse 1x 5.8 ms 25.2 MiB read 2 arrays 26.9 MiB peak"
+        parts = [f'profile {self.wall * 1e3:.1f} ms']
+        for name, totals in self.phases.items():
+            if totals['depth'] > 0:
+                continue
+            part = f"{name} {totals['calls']}x {totals['wall'] * 1e3:.1f} ms"
+            if totals['bytes_read']:
+                part += f" {totals['bytes_read'] / 2**20:.1f} MiB read"
+            if totals['arrays']:
+                part += f" {totals['arrays']} arrays"
+            if totals.get('peak_bytes'):
+                part += f" {totals['peak_bytes'] / 2**20:.1f} MiB peak"
+            parts.append(part)
+        return ' | '.join(parts)
+
+
+_active: Optional[ProfileReport] = None
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+@contextmanager
+def profile(memory: bool = True):
+    # Profile everything run inside the block into a fresh report. memory=False skips
+    # tracemalloc (which slows allocation-heavy code) and keeps the timing and counters only.
+    global _active
+    previous = _active
+    report = ProfileReport(memory)
+    _active = report
+    report._start()
+    try:
+        yield report
+    finally:
+        report._stop()
+        _active = previous
+
+
+def phase(name: str):
+    # context manager marking a phase inside an instrumented call
+    report = _active
+    if report is None:
+        return nullcontext()
+    return _Phase(report, name)
+
+
+class _Phase:
+    __slots__ = ('report', 'name')
+
+    def __init__(self, report: ProfileReport, name: str):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        self.report._enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.report._exit()
+        return False
+
+
+def instrument(name_or_function=None):
+    # @instrument or @instrument('name'); the default name is the function's qualified name
+    def decorate(function, name):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            report = _active
+            if report is None:
+                return function(*args, **kwargs)
+            report._enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                report._exit()
+        return wrapper
+
+    if callable(name_or_function):
+        return decorate(name_or_function, name_or_function.__qualname__)
+    return lambda function: decorate(function, name_or_function or function.__qualname__)
+
+
+def bytes_read(count: int):
+    report = _active
+    if report is not None and report._stack:
+        report._stack[-1].bytes_read += int(count)
+
+
+def allocated(*arrays):
+    # count freshly allocated arrays (not views) against the current phase
+    report = _active
+    if report is not None and report._stack:
+        frame = report._stack[-1]
+        for array in arrays:
+            frame.arrays += 1
+            frame.array_bytes += array.nbytes
+
+
+def _profile_from_environment():
+    global _active
+    setting = os.environ.get(PROFILE_ENV, '').strip()
+    if setting in ('', '0') or _active is not None:
+        return
+    report = ProfileReport(memory=True)
+    _active = report
+    report._start()
+
+    def finish():
+        global _active
+        if _active is report:
+            report._stop()
+            _active = None
+        if setting.lower().endswith('.json'):
+            report.to_json(setting, indent=2)
+        else:
+            print(report.summary(), file=sys.stderr)
+
+    atexit.register(finish)
+
+
+_profile_from_environment()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .spice import Spice
+from . import profiling
+
+# Sidecar layout, one directory per source file:
+#   meta.json   header state, case split points and the source fingerprint
+#   x.npy       x axis (already abs()'d like Spice.parse does)
+#   variable0.npy  variable 0 as y_raw[:, 0] holds it (x before abs(), in the trace dtype)
+#   traces.npy  (variable_num - 1, point_num), one contiguous row per trace
+# A loaded Spice builds y_raw from these on first access.
+CACHE_FORMAT_VERSION = 2
+DEFAULT_CACHE_DIR = Path(os.environ.get('CIRCUIT_CALCULATOR_CACHE',
+                                        Path.home() / '.cache' / 'circuit_calculator'))
+
+
+class RawCache:
+    def __init__(self, directory: Optional[Union[str, Path]] = None,
+                 max_bytes: Optional[int] = 10 * 1024 ** 3,
+                 validate: str = 'stat'):
+        if validate not in ('stat', 'hash'):
+            raise ValueError(f"validate must be 'stat' or 'hash', got '{validate}'")
+        self.directory = Path(directory) if directory is not None else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.validate = validate
+
+    def __repr__(self):
+        return f"<RawCache directory='{self.directory}' max_bytes={self.max_bytes} validate='{self.validate}'>"
+
+    def entry_path(self, file_path: Union[str, Path]) -> Path:
+        key = hashlib.sha1(str(Path(file_path).resolve()).encode('utf8')).hexdigest()
+        return self.directory / key
+
+    def _fingerprint(self, file_path: Union[str, Path]) -> dict:
+        stat = os.stat(file_path)
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if self.validate == 'hash':
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            fingerprint['sha256'] = digest.hexdigest()
+        return fingerprint
+
+    def _read_meta(self, entry: Path) -> Optional[dict]:
+        try:
+            with open(entry / 'meta.json', 'r', encoding='utf8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @profiling.instrument
+    def load(self, file_path: Union[str, Path]) -> Optional[Spice]:
+        entry = self.entry_path(file_path)
+        meta = self._read_meta(entry)
+        if meta is None or meta.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        if meta['fingerprint'] != self._fingerprint(file_path):
+            self.invalidate(file_path)
+            return None
+
+        spice = Spice._from_header_state(file_path, meta['header'])
+        spice.x_raw = np.load(entry / 'x.npy', mmap_mode='r')
+        spice._column_major = np.load(entry / 'traces.npy', mmap_mode='r')
+        spice._x_column = np.load(entry / 'variable0.npy', mmap_mode='r')
+        spice._y_raw = None
+        spice._case_split_point = np.asarray(meta['case_split_point'], dtype=np.intp)
+
+        # entries are evicted least recently used first
+        os.utime(entry / 'meta.json')
+        return spice
+
+    @profiling.instrument
+    def store(self, spice: Spice) -> Path:
+        if len(spice.x_raw) == 0:
+            spice.parse()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self.entry_path(spice.file_path)
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.directory))
+        try:
+            np.save(staging / 'x.npy', np.ascontiguousarray(spice.x_raw))
+            np.save(staging / 'variable0.npy', np.ascontiguousarray(spice._raw_column(0)))
+            traces = open_memmap(staging / 'traces.npy', mode='w+', dtype=np.dtype(spice._y_dtype),
+                                 shape=(spice._variable_num - 1, spice._point_num))
+            for variable_index in range(1, spice._variable_num):
+                traces[variable_index - 1] = spice._column(variable_index)
+            traces.flush()
+            del traces
+
+            meta = {
+                'version': CACHE_FORMAT_VERSION,
+                'source': str(Path(spice.file_path).resolve()),
+                'fingerprint': self._fingerprint(spice.file_path),
+                'header': spice._header_state(),
+                'case_split_point': [int(i) for i in spice._case_split_point],
+            }
+            with open(staging / 'meta.json', 'w', encoding='utf8') as f:
+                json.dump(meta, f)
+
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self.evict()
+        return entry
+
+    def open(self, file_path: Union[str, Path], **spice_kwargs) -> Spice:
+        spice = self.load(file_path)
+        if spice is None:
+            spice = Spice(file_path, **spice_kwargs).parse(memory_map=True)
+            self.store(spice)
+            spice = self.load(file_path)
+        return spice
+
+    def invalidate(self, file_path: Union[str, Path]) -> None:
+        shutil.rmtree(self.entry_path(file_path), ignore_errors=True)
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def _entries(self):
+        if not self.directory.exists():
+            return []
+        return [p for p in self.directory.iterdir() if p.is_dir() and not p.name.startswith('.staging-')]
+
+    @staticmethod
+    def _entry_size(entry: Path) -> int:
+        return sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+
+    def size(self) -> int:
+        return sum(self._entry_size(entry) for entry in self._entries())
+
+    def evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        entries = []
+        for entry in self._entries():
+            meta_file = entry / 'meta.json'
+            last_used = meta_file.stat().st_mtime if meta_file.exists() else 0.0
+            entries.append((last_used, self._entry_size(entry), entry))
+
+        total = sum(size for _, size, _ in entries)
+        # the newest entry is always kept, even when it alone exceeds max_bytes
+        for _, size, entry in sorted(entries, key=lambda e: e[0])[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
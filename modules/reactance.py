@@ -15,9 +15,9 @@ class Capacitive:
 
     @staticmethod
     def capacitance(frequency, reactance, metric=False):
-        l = mn.from_metric(reactance)
+        x = mn.from_metric(reactance)
         w = 2 * np.pi * mn.from_metric(frequency)
-        capacitance = w * l
+        capacitance = 1 / (w * x)
         if metric:
             return mn.to_metric(capacitance, 2)
         else:
@@ -1,13 +1,23 @@
 import numpy as np
 from modules import metric_notation as mn
 from modules import reactance as react
+from modules import eseries
 from modules.constants import *
 
 class LCTank:
+    # inductance/capacitance may be scalars or arrays (lists of metric strings included);
+    # every method broadcasts over them, so one tank can hold a whole candidate set
     def __init__(self, inductance, capacitance):
         self.inductance = mn.from_metric(inductance)
         self.capacitance = mn.from_metric(capacitance)
 
+    @classmethod
+    def grid(cls, inductances, capacitances):
+        # every L x C combination: inductance varies along rows, capacitance along columns
+        l = np.asarray(mn.from_metric(inductances), dtype=np.float64)
+        c = np.asarray(mn.from_metric(capacitances), dtype=np.float64)
+        return cls(l.reshape(-1, 1), c.reshape(1, -1))
+
     def frequency(self, metric=False):
         if metric:
             return Resonance.frequncy_from_l_c(self.inductance, self.capacitance, True)
@@ -32,9 +42,22 @@ class LCTank:
         reactance = self.inductive_reactance(frequency, True)
         adj_capacitance = Resonance.capacitance_from_l_f(self.inductance, 
                                                          frequency, True)
-        print(f'Frequency: {target_frequency}Hz Inductance: {mn.to_metric(
-            self.inductance, 2)}H Reactance: {reactance}{omega}')
+        inductance = mn.to_metric(self.inductance, 2)
+        print(f'Frequency: {target_frequency}Hz Inductance: {inductance}H Reactance: {reactance}{omega}')
         print(f'Adjust Capacitance: {adj_capacitance}F')
+        if np.ndim(self.inductance) == 0:
+            single = self.standard_capacitance(frequency, k=1, pairs=False)[0]
+            print(f"Nearest E24 Capacitance: {single['capacitor']} "
+                  f"({mn.to_metric(single['frequency'], 2)}Hz)")
+            combination = self.standard_capacitance(frequency, k=1)[0]
+            if combination['capacitor'] != single['capacitor']:
+                print(f"Nearest E24 Combination: {combination['capacitor']} "
+                      f"({mn.to_metric(combination['frequency'], 2)}Hz)")
+
+    def standard_capacitance(self, target_frequency, series='E24', k=5, pairs=True):
+        # realisable capacitors (single parts or pairs) for this tank's inductance
+        return eseries.search_lc(target_frequency, series=series, k=k, pairs=pairs,
+                                 inductance=self.inductance)
 
 
 class Resonance:
@@ -66,4 +89,8 @@ class Resonance:
         if metric:
             return mn.to_metric(inductance, 2)
         else:
-            return inductance
\ No newline at end of file
+            return inductance
+
+    @staticmethod
+    def standard_lc(frequency, reactance=None, q=None, resistance=None, series='E24', k=5, pairs=True):
+        return eseries.search_lc(frequency, reactance, q, resistance, series=series, k=k, pairs=pairs)
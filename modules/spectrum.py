@@ -0,0 +1,192 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Sequence
+import numpy as np
+from . import metric_notation as mn
+
+# Single-sided amplitude spectra of transient traces. LTspice's time axis is non-uniform, so
+# traces are first interpolated onto a uniform grid (one vectorized np.interp per trace), then
+# windowed and transformed with a real FFT. Amplitudes are scaled by the window's coherent
+# gain, so a sine of amplitude A peaks near A at its bin.
+#
+# Tone levels are read as band power: the squared amplitudes across the window's main lobe
+# around the tone, divided by the window's equivalent noise bandwidth (ENBW). That collects the
+# energy leaked into neighbouring bins, so the level no longer depends on where the tone falls
+# between bins. It needs the main lobes of neighbouring tones not to overlap, i.e. tones at
+# least main_lobe_bins * 2 bins apart; closer tones raise ValueError rather than read each
+# other's energy.
+
+_flattop = (0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368)
+_window_names = {'rect': 'rect', 'rectangular': 'rect', 'none': 'rect', 'hann': 'hann', 'hanning': 'hann',
+                 'hamming': 'hamming', 'blackman': 'blackman', 'flattop': 'flattop'}
+# main lobe half-width in bins (first null of the window's transform)
+main_lobe_bins = {'rect': 1, 'hann': 2, 'hamming': 2, 'blackman': 3, 'flattop': 5}
+# tried widest first when the window is chosen from the resolution; rect is never picked
+# automatically, its -13 dB sidelobes let a strong neighbour bleed into a weak tone's band
+_auto_windows = ('flattop', 'blackman', 'hann')
+
+
+def _window_name(name: str) -> str:
+    if name.lower() not in _window_names:
+        raise ValueError(f"Unknown window: '{name}'")
+    return _window_names[name.lower()]
+
+
+def window_function(name: str, points: int) -> np.ndarray:
+    name = _window_name(name)
+    if name == 'rect':
+        return np.ones(points)
+    if name == 'hann':
+        return np.hanning(points)
+    if name == 'hamming':
+        return np.hamming(points)
+    if name == 'blackman':
+        return np.blackman(points)
+    phase = 2 * np.pi * np.arange(points) / (points - 1)
+    return sum((-1) ** k * a * np.cos(k * phase) for k, a in enumerate(_flattop))
+
+
+def _check_spacing(frequencies: Iterable[float], resolution, window: str):
+    # main lobes of neighbouring tones must not overlap; resolution may be per case
+    tones = np.unique(np.asarray(list(frequencies), dtype=np.float64))
+    if len(tones) < 2:
+        return
+    spacing = np.min(np.diff(tones))
+    lobe = main_lobe_bins[_window_name(window)]
+    resolution = float(np.max(resolution))
+    if spacing < 2 * lobe * resolution:
+        raise ValueError(f"Tones {mn.to_metric(spacing)}Hz apart overlap in the '{window}' window's main lobe "
+                         f"at {mn.to_metric(resolution)}Hz bins; the record must be at least "
+                         f"{mn.to_metric(2 * lobe / spacing)}s long")
+
+
+def choose_window(frequencies: Iterable[float], resolution) -> str:
+    # widest (most accurate, least leakage) window whose main lobes keep the tones apart
+    frequencies = list(frequencies)
+    for window in _auto_windows:
+        try:
+            _check_spacing(frequencies, resolution, window)
+            return window
+        except ValueError:
+            continue
+    _check_spacing(frequencies, resolution, _auto_windows[-1])  # raises with the hann numbers
+
+
+def resample_uniform(time: np.ndarray, data: np.ndarray, points: Optional[int] = None):
+    # Uniform grid over the trace's own span; defaults to the sample count rounded up to a
+    # power of two so the FFT stays fast.
+    time = np.asarray(time, dtype=np.float64)
+    if points is None:
+        points = 1 << int(np.ceil(np.log2(max(len(time), 2))))
+    uniform_time = np.linspace(time[0], time[-1], points, endpoint=False)
+    return uniform_time, np.interp(uniform_time, time, np.asarray(data, dtype=np.float64))
+
+
+class Spectrum:
+    # frequency/amplitude are 1-D for one trace, or (cases, bins) for a stepped run
+    def __init__(self, frequency: np.ndarray, amplitude: np.ndarray, resolution, window: str):
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.resolution = resolution
+        self.window = window
+        # ENBW in bins of the window at this length (2 * (bins - 1) points for the even lengths
+        # resample_uniform produces)
+        weights = window_function(window, max(2 * (amplitude.shape[-1] - 1), 2))
+        self.enbw = len(weights) * np.sum(weights ** 2) / np.sum(weights) ** 2
+
+    def __repr__(self):
+        return f"<Spectrum bins={self.amplitude.shape[-1]} window='{self.window}'>"
+
+    def amplitude_at(self, frequency: float, band_bins: Optional[int] = None) -> np.ndarray:
+        # Amplitude of the tone at frequency from the power in the bins within +-band_bins of it
+        # (default: the window's main lobe), corrected by the window's ENBW. The result does not
+        # depend on where the tone falls between bins.
+        amplitude = np.atleast_2d(self.amplitude)
+        resolution = np.atleast_1d(self.resolution)
+        band_bins = main_lobe_bins[_window_name(self.window)] if band_bins is None else band_bins
+        centre = frequency / resolution
+        bins = np.rint(centre).astype(np.intp)[:, None] + np.arange(-band_bins, band_bins + 1)[None, :]
+        inside = (np.abs(bins - centre[:, None]) <= band_bins) & (bins >= 0) & (bins < amplitude.shape[-1])
+        levels = np.take_along_axis(amplitude, np.clip(bins, 0, amplitude.shape[-1] - 1), axis=-1)
+        power = np.sum(np.where(inside, levels ** 2, 0.0), axis=-1) / self.enbw
+        peaks = np.sqrt(power)
+        return peaks if np.ndim(self.amplitude) == 2 else peaks[0]
+
+    def thd(self, fundamental: float, harmonics: int = 10) -> np.ndarray:
+        # ratio (not %) of the RSS of harmonics 2..n below Nyquist to the fundamental
+        nyquist = np.max(self.frequency)
+        orders = [k for k in range(2, harmonics + 1) if k * fundamental < nyquist]
+        _check_spacing([fundamental, 2 * fundamental], self.resolution, self.window)
+        base = self.amplitude_at(fundamental)
+        if not orders:
+            return np.zeros_like(base)
+        levels = np.stack([self.amplitude_at(k * fundamental) for k in orders])
+        return np.sqrt(np.sum(levels ** 2, axis=0)) / base
+
+    def am_analysis(self, carrier_frequency: float, modulation_frequencies: Iterable[float]) -> Dict:
+        # Each tone of an AM signal puts m*Ac/2 in both sidebands, so m = (LSB + USB) / Ac.
+        modulation_frequencies = list(modulation_frequencies)
+        _check_spacing(tones(carrier_frequency, modulation_frequencies), self.resolution, self.window)
+        carrier = self.amplitude_at(carrier_frequency)
+        sidebands = {}
+        total_index = np.zeros_like(carrier)
+        for fm in modulation_frequencies:
+            lower = self.amplitude_at(carrier_frequency - fm)
+            upper = self.amplitude_at(carrier_frequency + fm)
+            index = (lower + upper) / carrier
+            sidebands[fm] = {
+                'lower': lower,
+                'upper': upper,
+                'lower_dbc': 20 * np.log10(lower / carrier),
+                'upper_dbc': 20 * np.log10(upper / carrier),
+                'modulation_index': index,
+            }
+            total_index = total_index + index ** 2
+        return {
+            'carrier': carrier,
+            'sidebands': sidebands,
+            # tones add in power, like the RMS sum of their individual indices
+            'modulation_index': np.sqrt(total_index),
+        }
+
+
+def tones(carrier_frequency: float, modulation_frequencies: Iterable[float]) -> list:
+    # carrier and both sidebands of every modulation tone
+    return [carrier_frequency] + [carrier_frequency + sign * fm for fm in modulation_frequencies for sign in (-1, 1)]
+
+
+def _amplitude_spectrum(uniform: np.ndarray, window: str) -> np.ndarray:
+    points = uniform.shape[-1]
+    weights = window_function(window, points)
+    spectrum = np.abs(np.fft.rfft(uniform * weights, axis=-1)) * (2.0 / weights.sum())
+    spectrum[..., 0] /= 2  # DC has no mirrored negative-frequency half
+    return spectrum
+
+
+def spectrum(time: np.ndarray, data: np.ndarray, window: str = 'hann', points: Optional[int] = None) -> Spectrum:
+    uniform_time, uniform = resample_uniform(time, data, points)
+    step = uniform_time[1] - uniform_time[0]
+    n = len(uniform_time)
+    return Spectrum(np.fft.rfftfreq(n, step), _amplitude_spectrum(uniform, window), 1.0 / (n * step), window)
+
+
+def case_spectra(sim, name: str, window: str = 'hann', points: Optional[int] = None,
+                 cases: Optional[Sequence[int]] = None, t_start=None, t_stop=None, periods=None,
+                 frequency=None) -> Spectrum:
+    # Every case of a stepped run resampled to the same point count and transformed in one
+    # batched rfft; each row keeps its own frequency axis in case the spans differ. The window
+    # (t_start/t_stop or the last periods of frequency) is applied to each case separately.
+    cases = range(sim.case_count) if cases is None else cases
+    traces = [sim.get_window(name, case, t_start, t_stop, periods, frequency) for case in cases]
+    if any(data is None for _, data in traces):
+        raise ValueError(f"No data found for signal '{name}'")
+    if points is None:
+        points = 1 << int(np.ceil(np.log2(max(max(len(t) for t, _ in traces), 2))))
+
+    uniform = np.empty((len(traces), points))
+    steps = np.empty(len(traces))
+    for row, (time, data) in enumerate(traces):
+        uniform_time, uniform[row] = resample_uniform(time, data, points)
+        steps[row] = uniform_time[1] - uniform_time[0]
+
+    frequency = np.fft.rfftfreq(points, 1.0)[None, :] / steps[:, None]
+    return Spectrum(frequency, _amplitude_spectrum(uniform, window), 1.0 / (points * steps), window)
@@ -1,21 +1,25 @@
 from __future__ import annotations
+import codecs
+import functools
 import os
 from pathlib import Path
 import platform
-from typing import List, Union
+from typing import Dict, Iterable, List, Optional, Union
 import numpy as np
 import re
+import warnings
 from . import metric_notation as mn
-from . import plt_theme as plot
-import matplotlib.pyplot as plt
+from . import measurements as meas
+from .decimation import DecimatedLine
+from .base_classes import BaseReadingTypes
+from . import spectrum as spec
+from . import profiling
 
 if list(map(lambda x: int(x), platform.python_version_tuple())) >= [3, 8, 0]:
     from typing import Literal
 else:
     from typing_extensions import Literal
 
-from deprecated import deprecated
-
 class LtspiceException(Exception):
     pass
 class VariableNotFoundException(LtspiceException):
@@ -27,9 +31,42 @@ class InvalidPhysicalValueRequestedException(LtspiceException):
 class UnknownEncodingTypeException(LtspiceException):
     pass
 
-import matplotlib.pyplot as plt
-
-def plot_signals(signals, metric_type):
+def deprecated(version: str, reason: str):
+    # same warning as deprecated.deprecated, without importing that package at startup
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            warnings.warn(f"Call to deprecated method {function.__name__}. ({reason}) "
+                          f"-- Deprecated since version {version}.", category=DeprecationWarning, stacklevel=2)
+            return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+_analysis_suffixes = ('.op', '.ac', '.tran')  # LTspice's <name>.op.raw etc.
+_step_line = re.compile(r'^\s*\.step\s+(.*)$', re.IGNORECASE)
+_step_assignment = re.compile(r'([^\s=]+)\s*=\s*(\S+)')
+
+def _parse_step_value(value: str) -> Union[float, str]:
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.lower().endswith('meg'):
+        try:
+            return float(value[:-3]) * 1e6
+        except ValueError:
+            return value
+    try:
+        return mn.from_metric(value)
+    except ValueError:
+        return value
+
+def plot_signals(signals, metric_type, decimate: bool = True):
+    # pyplot (and the theme, which needs it) is imported on first plot so that
+    # measurement-only scripts start without matplotlib
+    import matplotlib.pyplot as plt
+    from . import plt_theme as plot
     plt.rcParams.update(plot.theme)
     fig, axs = plt.subplots(len(signals), 1, figsize=(15, 3 * len(signals)), sharex=True)
 
@@ -38,9 +75,15 @@ def plot_signals(signals, metric_type):
 
     color_cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
 
+    lines = []
     for idx, (ax, sig) in enumerate(zip(axs, signals)):
         color = color_cycle[idx % len(color_cycle)]  # Cycle if too many signals
-        line, = ax.plot(sig.time, sig.data, color=color)
+        if decimate:
+            # min/max per pixel column, re-decimated on zoom
+            lines.append(DecimatedLine(ax, sig.time, sig.data, color=color))
+            line = lines[-1].line
+        else:
+            line, = ax.plot(sig.time, sig.data, color=color)
 
         # Get the metric
         metric = sig.read(metric_type)
@@ -70,14 +113,16 @@ def plot_signals(signals, metric_type):
     )
 
     plt.show()
+    return lines
 
 
 
 class Signal:
-    def __init__(self, sim, signal_name: str):
+    def __init__(self, sim, signal_name: str, case: int = 0, t_start=None, t_stop=None,
+                 periods=None, frequency=None):
         self.name = signal_name
-        self.data = sim.get_data(signal_name)
-        self.time = sim.get_time()
+        self.data = sim.get_data(signal_name, case)
+        self.time = sim.get_time(case)
 
         if self.data is None:
             raise ValueError(f"Signal '{signal_name}' not found in simulation data.")
@@ -85,9 +130,68 @@ class Signal:
         if len(self.data) != len(self.time):
             raise ValueError(f"Signal '{signal_name}' data length does not match time vector.")
 
+        self._spectra = {}
+        if any(v is not None for v in (t_start, t_stop, periods, frequency)):
+            window = meas.window_slice(self.time, t_start, t_stop, periods, frequency)
+            self.time = self.time[window]
+            self.data = self.data[window]
+
+    @classmethod
+    def from_arrays(cls, signal_name: str, time: np.ndarray, data: np.ndarray) -> Signal:
+        if len(data) != len(time):
+            raise ValueError(f"Signal '{signal_name}' data length does not match time vector.")
+        signal = cls.__new__(cls)
+        signal.name = signal_name
+        signal.time = time
+        signal.data = data
+        signal._spectra = {}
+        return signal
+
+    def window(self, t_start=None, t_stop=None, periods=None, frequency=None) -> Signal:
+        # views into this signal's arrays, so every measurement/plot path can take them as-is
+        window = meas.window_slice(self.time, t_start, t_stop, periods, frequency)
+        return Signal.from_arrays(self.name, self.time[window], self.data[window])
+
     def __repr__(self):
         return f"<Signal name='{self.name}' samples={len(self.data)}>"
 
+    @classmethod
+    def from_names(cls, sim, signal_names: Iterable[str]) -> List[Signal]:
+        signal_names = list(signal_names)
+        if hasattr(sim, 'variable_indices'):
+            missing = [name for name, index in sim.variable_indices(signal_names).items()
+                       if index is None and ',' not in name]
+            if missing:
+                raise ValueError(f"Signal(s) not found in simulation data: {', '.join(missing)}")
+        return [cls(sim, name) for name in signal_names]
+
+    def spectrum(self, window: str = 'hann', points: Optional[int] = None) -> spec.Spectrum:
+        # cached per window/point count; a windowed view gets its own cache
+        key = (window, points)
+        if key not in self._spectra:
+            self._spectra[key] = spec.spectrum(self.time, self.data, window, points)
+        return self._spectra[key]
+
+    def _resolution(self) -> float:
+        # bin spacing of spectrum(): the uniform grid spans the record, so 1 / duration
+        return 1.0 / (self.time[-1] - self.time[0])
+
+    def am_analysis(self, carrier_frequency, modulation_frequencies, window: Optional[str] = None,
+                    points: Optional[int] = None) -> Dict:
+        # window=None picks the widest window whose main lobe still separates the carrier and
+        # sidebands at this record length (spec.choose_window)
+        carrier_frequency = mn.from_metric(carrier_frequency)
+        modulation_frequencies = [mn.from_metric(f) for f in modulation_frequencies]
+        if window is None:
+            window = spec.choose_window(spec.tones(carrier_frequency, modulation_frequencies), self._resolution())
+        return self.spectrum(window, points).am_analysis(carrier_frequency, modulation_frequencies)
+
+    def thd(self, fundamental, harmonics: int = 10, window: Optional[str] = None, points: Optional[int] = None):
+        fundamental = mn.from_metric(fundamental)
+        if window is None:
+            window = spec.choose_window([fundamental, 2 * fundamental], self._resolution())
+        return self.spectrum(window, points).thd(fundamental, harmonics)
+
     def read(self, type: str):
         import re
         match = re.match(r'^([IV])\(', self.name.strip())
@@ -100,14 +204,20 @@ class Signal:
             peak = (np.max(self.data) - np.min(self.data)) / 2
             return f'{mn.to_metric(peak)}{meas_type}pk'
 
-    def plot(self, metric_type: str, coupling: str = 'DC'):
+    def plot(self, metric_type: str, coupling: str = 'DC', decimate: bool = True):
         import matplotlib.pyplot as plt
+        from . import plt_theme as plot
         plt.rcParams.update(plot.theme)
 
         fig, ax = plt.subplots(figsize=(15, 3))
 
         # Plot the signal
-        line, = ax.plot(self.time, self.data)
+        decimated = None
+        if decimate:
+            decimated = DecimatedLine(ax, self.time, self.data)
+            line = decimated.line
+        else:
+            line, = ax.plot(self.time, self.data)
 
         # Read and format metric
         metric = self.read(metric_type)
@@ -145,10 +255,12 @@ class Signal:
         fig.subplots_adjust(left=0.01, right=0.98, top=0.98, bottom=0.10)
         plt.tight_layout()
         plt.show()
+        return decimated
 
 
 class Spice:
-    max_header_size : int = int(1e6)
+    header_chunk_size : int = 1 << 16
+    ascii_chunk_size  : int = 1 << 22
     def __init__(self, file_path : Union[str, Path],
         mode      :Literal['Transient', 'FFT', 'AC', 'DC', 'Noise', 'Operating Point'] = 'Transient',
         file_type :Literal['Binary', 'Ascii'] = "Binary",
@@ -156,12 +268,21 @@ class Spice:
         y_dtype : Union[np.float32, np.float64, np.complex128] = np.float32, 
         encoding: Literal['utf-16-le', 'utf8', 'unknown'] = 'unknown'):
         
+        self._init_state(file_path, mode, file_type, x_dtype, y_dtype, encoding)
+        self.read_header()
+
+    def _init_state(self, file_path, mode, file_type, x_dtype, y_dtype, encoding)->None:
         self.file_path = file_path
         self.dsamp : int = 1
         self.tags  : List[str]= ['Title:', 'Date:', 'Plotname:', 'Flags:', 'No. Variables:', 'No. Points:', 'Offset:']
         self.x_raw = []
         self.y_raw = []
         self._case_split_point = []
+        self._step_parameters = None
+        self._lazy = False
+        self._trace_cache = {}
+        self._column_major = None  # optional (variable_num - 1, point_num) trace store, x kept in x_raw
+        self._x_column = None  # variable 0 as y_raw[:, 0] holds it, for layouts without y_raw
 
         #TODO : refactor header to another struct
         self.title = ''
@@ -173,6 +294,7 @@ class Spice:
         self._point_num :int       = 0   # all point number
         self._variables :List[str] = []  # variable list
         self._types     :List[str] = []  # type list
+        self._variable_index :Dict[str, int] = {}  # lowered name -> column
         self._mode       = mode 
         self._file_type  = file_type
         self._x_dtype    = x_dtype
@@ -180,67 +302,115 @@ class Spice:
         self._encoding   = encoding
 
         self.header_size = 0
-        self.read_header()
+
+    # everything read_header() produces, used to persist and restore a parsed file
+    _header_fields = ('title', 'date', 'plot_name', 'flags', 'offset', 'header_size',
+                      '_point_num', '_variable_num', '_variables', '_types',
+                      '_mode', '_file_type', '_encoding')
+
+    def _header_state(self) -> dict:
+        state = {field: getattr(self, field) for field in self._header_fields}
+        state['_x_dtype'] = np.dtype(self._x_dtype).str
+        state['_y_dtype'] = np.dtype(self._y_dtype).str
+        return state
+
+    @classmethod
+    def _from_header_state(cls, file_path: Union[str, Path], state: dict) -> Spice:
+        spice = cls.__new__(cls)
+        spice._init_state(file_path, state['_mode'], state['_file_type'],
+                          np.dtype(state['_x_dtype']).type, np.dtype(state['_y_dtype']).type, state['_encoding'])
+        for field in cls._header_fields:
+            setattr(spice, field, state[field])
+        spice._variable_index = {}
+        for index, variable in enumerate(spice._variables):
+            spice._variable_index.setdefault(variable.lower(), index)
+        return spice
+
+    @classmethod
+    def from_arrays(cls, variables: List[str], types: List[str], x: np.ndarray, y: np.ndarray,
+                    mode: str = 'AC', plot_name: str = '', title: str = '') -> Spice:
+        # In-memory result with the same interface as a parsed file, e.g. for computed sweeps.
+        # y is (points, variables) including the x column; .step cases are found from x as usual.
+        x = np.asarray(x)
+        y = np.asarray(y)
+        spice = cls.__new__(cls)
+        spice._init_state(None, mode, 'Binary', y.dtype.type, y.dtype.type, 'unknown')
+        spice.title = title
+        spice.plot_name = plot_name
+        spice.flags = ['complex' if np.iscomplexobj(y) else 'real', 'forward']
+        spice._point_num = len(x)
+        spice._variable_num = len(variables)
+        spice._variables = list(variables)
+        spice._types = list(types)
+        for index, variable in enumerate(spice._variables):
+            spice._variable_index.setdefault(variable.lower(), index)
+
+        spice.y_raw = y
+        spice.x_raw = np.abs(x) if mode in ('Transient', 'AC', 'FFT') else x
+        case_starts = np.flatnonzero(spice.x_raw[1:] == spice.x_raw[0]) + 1
+        spice._case_split_point = np.concatenate(([0], case_starts, [len(x)])).astype(np.intp)
+        return spice
 
     def set_variable_dtype(self, t)->Spice:
         self._y_dtype = t
         return self
 
+    @staticmethod
+    def _detect_encoding(head: bytes):
+        # returns (encoding, bom size); LTspice usually writes UTF-16-LE without a BOM
+        if head.startswith(codecs.BOM_UTF16_LE):
+            return 'utf-16-le', len(codecs.BOM_UTF16_LE)
+        if head.startswith(codecs.BOM_UTF8):
+            return 'utf-8', len(codecs.BOM_UTF8)
+        if len(head) >= 2 and head[0] != 0 and head[1] == 0:
+            return 'utf-16-le', 0
+        return 'utf-8', 0
+
+    @profiling.instrument
     def read_header(self)->None:
-        filesize = os.stat(self.file_path).st_size
-        
-        # if the file is too big, read only the designated amount of bytes
         with open(self.file_path, 'rb') as f:
-            if filesize > self.max_header_size:
-                data = f.read(self.max_header_size)  
-            else:
-                data = f.read()  
-
-        #TODO : have to find more adequate way to determine proper encoding of text..
-        try:
-            buffer_line = ''
-            header_content_lines = []   
-            byte_index_line_begin = 0
-            byte_index_line_end = 0
-            try:
-                while not ('Binary' in buffer_line or 'Values' in buffer_line):
-                    if bytes([data[byte_index_line_end]]) == b'\n':
-                        buffer_line = str(bytes(data[byte_index_line_begin:byte_index_line_end+2]), encoding='UTF16')
-                        header_content_lines.append(buffer_line)
-                        byte_index_line_begin = byte_index_line_end+2
-                        byte_index_line_end   = byte_index_line_begin
-                    else:
-                        byte_index_line_end += 1
-                self._encoding = 'utf-16-le'
-            except IndexError as e:
-                print("Variable description header size is over 1Mbyte. Please adjust max_header_size manually.")
-                raise e
-        except UnicodeDecodeError as e:
-            buffer_line = ''
-            header_content_lines = []   
-            byte_index_line_begin = 0
-            byte_index_line_end = 0
-            try:
-                while not ('Binary' in buffer_line or 'Values' in buffer_line):
-                    if bytes([data[byte_index_line_end]]) == b'\n':
-                        buffer_line = str(bytes(data[byte_index_line_begin:byte_index_line_end+1]), encoding='UTF8')
-                        header_content_lines.append(buffer_line)
-                        byte_index_line_begin = byte_index_line_end+1
-                        byte_index_line_end   = byte_index_line_begin
-                    else:
-                        byte_index_line_end += 1
-                self._encoding = 'utf-8'
-            except IndexError as e:
-                print("Variable description header size is over 1Mbyte. Please adjust max_header_size manually.")
-                raise e
-
-        if self._encoding == 'unknown':
-            raise UnknownEncodingTypeException("Unknown encoding type")
-
-        header_content_lines = [x.rstrip().rstrip() for x in header_content_lines]
+            data = bytearray(f.read(self.header_chunk_size))
+            profiling.bytes_read(len(data))
+            encoding, bom_size = self._detect_encoding(data)
+            if self._encoding != 'unknown':
+                encoding = 'utf-16-le' if self._encoding.replace('-', '').lower() == 'utf16le' else 'utf-8'
+
+            newline = '\n'.encode(encoding)
+            markers = ['\nBinary:'.encode(encoding), '\nValues:'.encode(encoding)]
+            char_size = len(newline)
+
+            # grow the buffer chunk by chunk, only re-scanning the tail that may hold a split marker
+            search_from = bom_size
+            header_end = -1
+            while header_end < 0:
+                for marker in markers:
+                    pos = data.find(marker, search_from)
+                    while pos >= 0 and (pos - bom_size) % char_size:
+                        pos = data.find(marker, pos + 1)
+                    if pos >= 0:
+                        line_end = data.find(newline, pos + len(marker))
+                        while line_end >= 0 and (line_end - bom_size) % char_size:
+                            line_end = data.find(newline, line_end + 1)
+                        if line_end >= 0:
+                            header_end = line_end + char_size
+                            break
+                if header_end >= 0:
+                    break
+
+                chunk = f.read(self.header_chunk_size)
+                profiling.bytes_read(len(chunk))
+                if not chunk:
+                    raise UnknownEncodingTypeException("No 'Binary:' or 'Values:' section found in header")
+                search_from = max(bom_size, len(data) - 2 * len(markers[0]))
+                data.extend(chunk)
+
+        self._encoding = encoding
+        header_content_lines = data[bom_size:header_end].decode(encoding).split('\n')[:-1]
 
         # remove string header from binary data 
-        self.header_size = byte_index_line_end
+        self.header_size = header_end
+
+        header_content_lines = [x.rstrip() for x in header_content_lines]
 
         variable_declaration_line_num = header_content_lines.index('Variables:')
         header_content_only_lines     = header_content_lines[0:variable_declaration_line_num]
@@ -267,6 +437,11 @@ class Spice:
             self._variables.append(variable_type_split_list[1])
             self._types.append(variable_type_split_list[2])
 
+        # first declaration wins, matching the old list.index() lookup
+        self._variable_index = {}
+        for index, variable in enumerate(self._variables):
+            self._variable_index.setdefault(variable.lower(), index)
+
         # check mode
         if 'FFT' in self.plot_name:
             self._mode = 'FFT'
@@ -299,83 +474,326 @@ class Spice:
             self._x_dtype = np.complex128
         
     
-    def parse(self):
+    @profiling.instrument
+    def parse(self, memory_map: bool = False, lazy: bool = False, column_major: bool = False):
+        # lazy=True maps the file read-only and copies out a trace only when it is first requested
+        # (see _column); the text layout is not seekable per column, so Ascii files always load fully
+        if self._file_type == 'Columnar':
+            # read_columnar already loaded x and the case split; file_path is the export, not a .raw
+            return self
+        self._lazy = lazy and self._file_type == 'Binary'
+        self._trace_cache = {}
+        self._column_major = None
+        self._x_column = None
+        self._case_split_point = []
+
         if self._file_type == 'Binary':
-            #Check data size
-            variable_data_size = np.dtype(self._y_dtype).itemsize  
-            time_data_size     = np.dtype(self._x_dtype).itemsize  
-            diff = int(( time_data_size - variable_data_size ) / variable_data_size)
+            # memory_map=True keeps the samples on disk and pages them in on access;
+            # copy-on-write so callers may still modify y_raw without touching the file
+            with profiling.phase('Spice.parse:read'):
+                if self._lazy:
+                    data = np.memmap(self.file_path, dtype=np.uint8, mode='r', offset=self.header_size)
+                elif memory_map:
+                    data = np.memmap(self.file_path, dtype=np.uint8, mode='c', offset=self.header_size)
+                else:
+                    with open(self.file_path, 'rb') as f:
+                        f.seek(self.header_size)
+                        data = np.fromfile(f, dtype=np.uint8)
+                    profiling.bytes_read(len(data))
+                    profiling.allocated(data)
+
+                self._check_data_size(len(data))
+
+            with profiling.phase('Spice.parse:decode'):
+                if self._y_dtype == self._x_dtype:
+                    self._y_dtype = self._x_dtype
+                    self.y_raw = np.frombuffer(data, dtype=self._y_dtype)
+                    self.x_raw = self.y_raw[::self._variable_num]
+                    self.y_raw = np.reshape(self.y_raw, (self._point_num, self._variable_num))
+                else:
+                    # Mixed precision rows (e.g. double time + float traces) are decoded in one pass
+                    # with a packed record dtype; traces are views into _records and the 2-D y_raw
+                    # is only built if someone asks for it.
+                    self._records = data.view(self._row_dtype())
+                    self._y_raw = None
+                    self.x_raw = self._records['x']
+
+                if self._mode == "Transient" or self._mode == "AC" or self._mode == "FFT":
+                    self.x_raw = np.abs(self.x_raw)
+                    profiling.allocated(self.x_raw)
+                elif self._lazy:
+                    self.x_raw = np.array(self.x_raw)
+                    profiling.allocated(self.x_raw)
+                
+        elif self._file_type == 'Ascii':
+            self.y_raw = self._parse_ascii()
+            self.x_raw = self.y_raw[:,0]
 
-            variable_data_len  = self._point_num * (self._variable_num - 1) * variable_data_size
-            time_data_len      = self._point_num * time_data_size
-            expected_data_len  = variable_data_len + time_data_len
+        # Split cases: every sample that repeats the first x value starts a new .step case
+        with profiling.phase('Spice.parse:split_cases'):
+            if len(self.x_raw):
+                case_starts = np.flatnonzero(self.x_raw[1:] == self.x_raw[0]) + 1
+            else:
+                case_starts = np.empty(0, dtype=np.intp)
+            self._case_split_point = np.concatenate(([0], case_starts, [self._point_num])).astype(np.intp)
 
-            with open(self.file_path, 'rb') as f:
-                data = f.read()[self.header_size:]
-            
-            if not len(data) == expected_data_len:
-                if len(data) == variable_data_len * 2 + time_data_len:
-                    print("[Warning] Variable data type is detected as double precision.")
-                    self._y_dtype = np.float64
+        if column_major:
+            self.to_column_major()
+        return self
+
+    def _check_data_size(self, data_len: int) -> None:
+        variable_data_size = np.dtype(self._y_dtype).itemsize  
+        time_data_size     = np.dtype(self._x_dtype).itemsize  
+
+        variable_data_len  = self._point_num * (self._variable_num - 1) * variable_data_size
+        time_data_len      = self._point_num * time_data_size
+        expected_data_len  = variable_data_len + time_data_len
+
+        if not data_len == expected_data_len:
+            if data_len == variable_data_len * 2 + time_data_len:
+                print("[Warning] Variable data type is detected as double precision.")
+                self._y_dtype = np.float64
+            else:
+                raise FileSizeNotMatchException
+
+    def _resolve_signal(self, name: str) -> Optional[List[int]]:
+        # column indices of a plain name, or of both nodes of a differential V(a, b)
+        if ',' in name:
+            variable_names = [v.strip() for v in re.split(r',|\(|\)', name) if v.strip()]
+            if len(variable_names) < 3:
+                raise ValueError(f"Invalid differential signal format: {name}")
+            indices = [self.variable_index(f'V({n})') for n in variable_names[1:3]]
+            if None in indices:
+                raise ValueError(f"Signal(s) missing in .raw file: {variable_names[1]} or {variable_names[2]}")
+            return indices
+        index = self.variable_index(name)
+        return None if index is None else [index]
+
+    def iter_blocks(self, names: Iterable[str], block_points: int = 1 << 16, t_start=None, t_stop=None):
+        # Out-of-core reader: yields (case, x, {name: data}) for at most block_points rows at a
+        # time, read with np.fromfile so memory stays fixed whatever the file size. A block
+        # never spans two .step cases, and is clipped to t_start <= x <= t_stop in every case.
+        names = list(names)
+        columns = {}
+        for name in names:
+            indices = self._resolve_signal(name)
+            if indices is None:
+                raise VariableNotFoundException(f"No data found for signal '{name}'")
+            columns[name] = indices
+
+        if self._file_type == 'Columnar':
+            yield from self._iter_loaded_blocks(columns, block_points, t_start, t_stop)
+            return
+        if self._file_type != 'Binary':
+            raise LtspiceException("Streaming is only supported for binary .raw files")
+
+        self._check_data_size(os.stat(self.file_path).st_size - self.header_size)
+        row_dtype = self._row_dtype()
+        take_abs = self._mode in ("Transient", "AC", "FFT")
+
+        def column(rows, x, index):
+            return x if index == 0 else rows['y'][:, index - 1]
+
+        case = 0
+        first_x = None
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.header_size)
+            while True:
+                rows = np.fromfile(f, dtype=row_dtype, count=block_points)
+                profiling.bytes_read(rows.nbytes)
+                if len(rows) == 0:
+                    break
+                x = np.abs(rows['x']) if take_abs else rows['x']
+                if first_x is None:
+                    first_x = x[0]
+                    starts = np.flatnonzero(x[1:] == first_x) + 1
                 else:
+                    starts = np.flatnonzero(x == first_x)
+
+                # every start found in this block opens the next case
+                bounds = np.concatenate(([0], starts, [len(rows)]))
+                for segment, (begin, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+                    if segment > 0:
+                        case += 1
+                    if t_start is not None or t_stop is not None:
+                        low, high = meas.window_bounds(x[begin:end], t_start, t_stop)
+                        begin, end = begin + low, begin + high
+                    if end <= begin:
+                        continue
+                    block_x = x[begin:end]
+                    data = {}
+                    for name, indices in columns.items():
+                        values = column(rows[begin:end], block_x, indices[0])
+                        if len(indices) == 2:
+                            values = values - column(rows[begin:end], block_x, indices[1])
+                        data[name] = values
+                    yield case, block_x, data
+
+    def _iter_loaded_blocks(self, columns: Dict[str, List[int]], block_points: int, t_start, t_stop):
+        # iter_blocks over a Spice from read_columnar: x is loaded, traces come from the export
+        for case in range(self.case_count):
+            case_begin = self._case_split_point[case]
+            low, high = meas.window_bounds(self.get_x(case), t_start, t_stop)
+            for begin in range(case_begin + low, case_begin + high, block_points):
+                end = min(begin + block_points, case_begin + high)
+                block_x = self.x_raw[begin:end]
+                data = {}
+                for name, indices in columns.items():
+                    values = block_x if indices[0] == 0 else self._column(indices[0])[begin:end]
+                    if len(indices) == 2:
+                        values = values - (block_x if indices[1] == 0 else self._column(indices[1])[begin:end])
+                    data[name] = values
+                yield case, block_x, data
+
+    def _last_x(self) -> float:
+        # x of the final row, read without touching the rest of the file
+        if self._file_type == 'Columnar':
+            return float(self.x_raw[-1])
+        if self._file_type != 'Binary':
+            raise LtspiceException("Streaming is only supported for binary .raw files")
+        row_dtype = self._row_dtype()
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.header_size + (self._point_num - 1) * row_dtype.itemsize)
+            last = np.fromfile(f, dtype=row_dtype, count=1)
+        return float(np.abs(last['x'][0]))
+
+    @profiling.instrument
+    def stream_statistics(self, names: Iterable[str], block_points: int = 1 << 16, t_start=None, t_stop=None,
+                          periods=None, frequency=None) -> List[Dict[str, meas.TraceStatistics]]:
+        # per case, one TraceStatistics per signal (including time-weighted integrals), over the
+        # same window as measure(). Without t_stop, periods count back from the last sample of
+        # the file (the .step cases of a transient share its stop time).
+        names = list(names)
+        if periods is not None or frequency is not None:
+            end_time = self._last_x() if t_stop is None else t_stop
+            t_start, t_stop = meas.window_times(np.array([end_time]), t_start, t_stop, periods, frequency)
+        cases = []
+        for case, x, data in self.iter_blocks(names, block_points, t_start, t_stop):
+            while len(cases) <= case:
+                cases.append({name: meas.TraceStatistics() for name in names})
+            for name, values in data.items():
+                cases[case][name].update(values, x)
+        return cases
+
+    @profiling.instrument
+    def stream_measure(self, names: Iterable[str], readings=tuple(BaseReadingTypes), case: int = 0,
+                       block_points: int = 1 << 16, t_start=None, t_stop=None, periods=None,
+                       frequency=None) -> Dict[str, Dict[BaseReadingTypes, float]]:
+        # same result shape as SpiceSim.measure(..., output=Output.raw), without loading the file
+        statistics = self.stream_statistics(names, block_points, t_start, t_stop, periods, frequency)[case]
+        return {name: stats.readings(readings) for name, stats in statistics.items()}
+
+    @profiling.instrument('Spice.parse:ascii')
+    def _parse_ascii(self) -> np.ndarray:
+        # Values: blocks are "<point>\t<x>" followed by one "\t<value>" (or "\tre,im") line per
+        # variable. Chunks are decoded incrementally and whitespace/comma tokens converted in bulk;
+        # a point split across chunks is carried over as text.
+        is_complex = np.issubdtype(np.dtype(self._y_dtype), np.complexfloating)
+        width = 2 if is_complex else 1
+        tokens_per_point = 1 + self._variable_num * width
+
+        y_raw = np.empty((self._point_num, self._variable_num), dtype=self._y_dtype)
+        profiling.allocated(y_raw)
+        decoder = codecs.getincrementaldecoder(self._encoding)()
+        row = 0
+        carry = ''
+
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.header_size)
+            while row < self._point_num:
+                chunk = f.read(self.ascii_chunk_size)
+                profiling.bytes_read(len(chunk))
+                final = not chunk
+                text = carry + decoder.decode(chunk, final=final)
+                if not final:
+                    cut = text.rfind('\n') + 1
+                    text, carry = text[:cut], text[cut:]
+
+                tokens = text.replace(',', ' ').split()
+                points = len(tokens) // tokens_per_point
+                if final and len(tokens) % tokens_per_point:
                     raise FileSizeNotMatchException
+                if points:
+                    rest = tokens[points * tokens_per_point:]
+                    values = np.array(tokens[:points * tokens_per_point], dtype=np.float64)
+                    values = values.reshape((points, tokens_per_point))[:, 1:]
+                    if is_complex:
+                        values = values[:, 0::2] + 1j * values[:, 1::2]
+                    points = min(points, self._point_num - row)
+                    y_raw[row:row + points] = values[:points]
+                    row += points
+                    carry = ' '.join(rest) + ' ' + carry if rest else carry
+                if final:
+                    break
+
+        if row != self._point_num:
+            raise FileSizeNotMatchException
+        return y_raw
 
-            if self._y_dtype == self._x_dtype:
-                self._y_dtype = self._x_dtype
-                self.y_raw = np.frombuffer(data, dtype=self._y_dtype)
-                self.x_raw = self.y_raw[::self._variable_num]
-                self.y_raw = np.reshape(self.y_raw, (self._point_num, self._variable_num))
+    @property
+    def y_raw(self):
+        # (points, variables) array with x in column 0, as before. Mixed-precision files are parsed
+        # into packed records (_records) and cache entries keep one row per trace, so for those
+        # the array is assembled on first access, x cast to the trace dtype like the original
+        # row-by-row decoder did.
+        if self._y_raw is None:
+            variable0 = self._variable0()
+            y_raw = np.empty((len(variable0), self._variable_num), dtype=variable0.dtype)
+            profiling.allocated(y_raw)
+            y_raw[:, 0] = variable0
+            if self._records is not None:
+                y_raw[:, 1:] = self._records['y']
             else:
-                self.y_raw = np.frombuffer(data, dtype=self._y_dtype)
-                self.x_raw = np.zeros(self._point_num, dtype=self._x_dtype)
-                for i in range(self._point_num):
-                    d = data[
-                            i * (self._variable_num + diff) * variable_data_size:
-                            i * (self._variable_num + diff) * variable_data_size + time_data_size
-                        ]
-                        
-                    self.x_raw[i] = np.frombuffer(d, dtype=self._x_dtype)
-
-                self.y_raw = np.reshape(np.array(self.y_raw), (self._point_num, self._variable_num + diff))
-                self.y_raw = self.y_raw[:, diff:]
-                self.y_raw[:,0] = self.x_raw
-            
-            if self._mode == "Transient" or self._mode == "AC" or self._mode == "FFT":
-                self.x_raw = np.abs(self.x_raw)
-                
-        elif self._file_type == 'Ascii':
-            with open(self.file_path, 'r', encoding=self._encoding) as f:
-                data = f.readlines()
-            data = [x.rstrip() for x in data]
-            data = data[data.index('Values:') + 1:]
-
-            if self._y_dtype == np.float64 or self._y_dtype == np.float32:
-                self.y_raw = np.array([self._y_dtype(
-                    x.split('\t')[-1]
-                    ) for  x  in data]).reshape((self._point_num, self._variable_num))
-                pass
-
-            if self._y_dtype == np.complex128 or self._y_dtype == np.complex64:
-                data = list(filter(lambda x : len(x) > 0 , data))
-                self.y_raw = np.array([self._y_dtype(
-                    complex(*[float(y) for y in x.split('\t', 1)[-1].split(',')])
-                    ) for  x  in data]).reshape((self._point_num, self._variable_num))
-                pass
-
-            self.x_raw = self.y_raw[:,0]
-            pass
-              
-        # Split cases
-        self._case_split_point.append(0)
+                for variable_index in range(1, self._variable_num):
+                    y_raw[:, variable_index] = self._raw_column(variable_index)
+            self._y_raw = y_raw
+        return self._y_raw
+
+    @y_raw.setter
+    def y_raw(self, value):
+        self._y_raw = value
+        self._records = None
+        self._x_column = None
+
+    @profiling.instrument
+    def to_column_major(self, block_rows: int = 1 << 16) -> Spice:
+        # Rows of a .raw file interleave every variable, so a trace read from y_raw walks memory
+        # with a stride of one full row. Transpose once (in row blocks, to stay cache friendly)
+        # into one contiguous buffer per trace; x stays in x_raw.
+        self._ensure_parsed()
+        if self._column_major is not None:
+            return self
+
+        if self._records is not None:
+            traces = self._records['y']
+        else:
+            traces = self.y_raw[:, 1:]
 
-        start_value = self.x_raw[0]
+        store = np.empty((self._variable_num - 1, self._point_num), dtype=traces.dtype)
+        profiling.allocated(store)
+        for begin in range(0, self._point_num, block_rows):
+            end = min(begin + block_rows, self._point_num)
+            store[:, begin:end] = traces[begin:end].T
 
-        for i in range(self._point_num - 1):
-            if self.x_raw[i + 1] == start_value:
-                self._case_split_point.append(i + 1)
-        self._case_split_point.append(self._point_num)
+        self._column_major = store
+        self._trace_cache = {}
         return self
 
+    def _ensure_parsed(self):
+        if len(self.x_raw) == 0:
+            self.parse(lazy=True)
+
+    def variable_index(self, name: str) -> Optional[int]:
+        return self._variable_index.get(name.lower())
+
+    def variable_indices(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        index = self._variable_index
+        return {name: index.get(name.lower()) for name in names}
+
+    def get_data_many(self, names: Iterable[str], case=0, time=None, frequency=None) -> Dict[str, Optional[np.ndarray]]:
+        return {name: self.get_data(name, case, time, frequency) for name in names}
+
+    @profiling.instrument
     def get_data(self, name, case=0, time=None, frequency=None):
         # Handle differential signals like V(n003, n005)
         if ',' in name:
@@ -387,23 +805,25 @@ class Spice:
                 raise ValueError(f"Invalid differential signal format: {name}")
             
             # Extract individual node voltages
-            data1 = self.get_data(f'V({variable_names[1]})', case, time)
-            data2 = self.get_data(f'V({variable_names[2]})', case, time)
+            data1 = self.get_data(f'V({variable_names[1]})', case, time, frequency)
+            data2 = self.get_data(f'V({variable_names[2]})', case, time, frequency)
 
             if data1 is None or data2 is None:
                 raise ValueError(f"Signal(s) missing in .raw file: {variable_names[1]} or {variable_names[2]}")
 
-            return data1 - data2
+            difference = data1 - data2
+            profiling.allocated(difference)
+            return difference
 
         else:
             # Case-insensitive match against available variables
-            variables_lowered = [v.lower() for v in self._variables]
+            variable_index = self._variable_index.get(name.lower())
 
-            if name.lower() not in variables_lowered:
+            if variable_index is None:
                 return None
 
-            variable_index = variables_lowered.index(name.lower())
-            data = self.y_raw[self._case_split_point[case]:self._case_split_point[case + 1], variable_index]
+            self._ensure_parsed()
+            data = self._column(variable_index)[self._case_split_point[case]:self._case_split_point[case + 1]]
 
             # Return full waveform or interpolate based on time/frequency
             if time is None and frequency is None:
@@ -416,7 +836,67 @@ class Spice:
                 return None
  
 
+    def _row_dtype(self) -> np.dtype:
+        return np.dtype([('x', self._x_dtype), ('y', self._y_dtype, (self._variable_num - 1,))])
+
+    def _column(self, variable_index: int) -> np.ndarray:
+        if self._lazy:
+            if variable_index not in self._trace_cache:
+                self._trace_cache[variable_index] = np.ascontiguousarray(self._raw_column(variable_index))
+                profiling.allocated(self._trace_cache[variable_index])
+            return self._trace_cache[variable_index]
+        return self._raw_column(variable_index)
+
+    def _raw_column(self, variable_index: int) -> np.ndarray:
+        # Every layout returns what row-major y_raw[:, variable_index] holds, so get_data does
+        # not depend on how the file was parsed. Variable 0 is x before abs(), in the trace
+        # dtype; x_raw is the (abs'd, x dtype) axis used for time/frequency.
+        if variable_index == 0:
+            return self._variable0()
+        if self._column_major is not None:
+            return self._column_major[variable_index - 1]
+        if self._records is not None:
+            return self._records['y'][:, variable_index - 1]
+        return self.y_raw[:, variable_index]
+
+    def _variable0(self) -> np.ndarray:
+        if self._x_column is None:
+            if self._records is not None:
+                self._x_column = self._records['x'].astype(self._records['y'].dtype)
+                profiling.allocated(self._x_column)
+            elif isinstance(self._y_raw, np.ndarray):
+                self._x_column = self._y_raw[:, 0]
+            else:
+                # restored from an export, which keeps only the axis
+                self._x_column = np.asarray(self.x_raw).astype(self._y_dtype)
+        return self._x_column
+
+    def window_slice(self, case=0, t_start=None, t_stop=None, periods=None, frequency=None) -> slice:
+        return meas.window_slice(self.get_time(case), t_start, t_stop, periods, frequency)
+
+    def get_window(self, name, case=0, t_start=None, t_stop=None, periods=None, frequency=None):
+        # (time, data) views limited to the window; None for data if the name is unknown
+        window = self.window_slice(case, t_start, t_stop, periods, frequency)
+        data = self.get_data(name, case)
+        return self.get_time(case)[window], None if data is None else data[window]
+
+    def case_spectra(self, name, window: str = 'hann', points: Optional[int] = None, cases=None,
+                     t_start=None, t_stop=None, periods=None, frequency=None) -> spec.Spectrum:
+        return spec.case_spectra(self, name, window, points, cases, t_start, t_stop, periods, frequency)
+
+    def export(self, path: Union[str, Path], format: Optional[str] = None, chunk_points: int = 1 << 16,
+               compression: Optional[str] = None) -> Path:
+        # every case and variable to Parquet or HDF5 (format from the suffix), one chunk at a time
+        from .columnar import export
+        return export(self, path, format, chunk_points, compression)
+
+    @classmethod
+    def from_columnar(cls, path: Union[str, Path], format: Optional[str] = None) -> Spice:
+        from .columnar import read_columnar
+        return read_columnar(path, format)
+
     def get_x(self, case=0):
+        self._ensure_parsed()
         return self.x_raw[self._case_split_point[case]:self._case_split_point[case + 1]]
     
     def get_time(self, case=0):
@@ -435,6 +915,14 @@ class Spice:
     def variables(self):
         return self._variables
 
+    @property
+    def trace_names(self) -> List[str]:
+        # every variable except the sweep axis (time, frequency, ...). An operating point has no
+        # axis: variable 0 is a node voltage like the rest.
+        if self._mode in ('Transient', 'AC', 'FFT', 'DC', 'Noise'):
+            return self._variables[1:]
+        return list(self._variables)
+
     @property
     def time(self):
         return self.get_time(case=0)
@@ -447,6 +935,60 @@ class Spice:
     def case_count(self):
         return len(self._case_split_point) - 1
 
+    def _log_path(self) -> Path:
+        # BaseInjectedAM.raw and BaseInjectedAM.op.raw both log to BaseInjectedAM.log; only the
+        # known suffixes are removed, so amp.v2.raw logs to amp.v2.log
+        path = Path(self.file_path)
+        if path.suffix.lower() == '.raw':
+            path = path.with_suffix('')
+        if path.suffix.lower() in _analysis_suffixes:
+            path = path.with_suffix('')
+        return path.with_name(path.name + '.log')
+
+    def read_step_log(self, log_path: Optional[Union[str, Path]] = None) -> List[Dict[str, Union[float, str]]]:
+        log_path = Path(log_path) if log_path is not None else self._log_path()
+        if not log_path.exists():
+            self._step_parameters = []
+            return self._step_parameters
+
+        with open(log_path, 'rb') as f:
+            content = f.read()
+        encoding, bom_size = self._detect_encoding(content)
+        text = content[bom_size:].decode(encoding, errors='replace')
+
+        steps = []
+        for line in text.splitlines():
+            match = _step_line.match(line)
+            if not match:
+                continue
+            step = {}
+            for name, value in _step_assignment.findall(match.group(1)):
+                step[name.lower()] = _parse_step_value(value)
+            steps.append(step)
+
+        self._step_parameters = steps
+        return steps
+
+    @property
+    def step_parameters(self) -> List[Dict[str, Union[float, str]]]:
+        if self._step_parameters is None:
+            self.read_step_log()
+        return self._step_parameters
+
+    def cases_where(self, **parameters) -> np.ndarray:
+        steps = self.step_parameters
+        selected = np.ones(len(steps), dtype=bool)
+        for name, value in parameters.items():
+            column = [step.get(name.lower()) for step in steps]
+            if isinstance(value, str):
+                value = _parse_step_value(value)
+            if isinstance(value, str):
+                selected &= np.array([v == value for v in column], dtype=bool)
+            else:
+                numeric = np.array([v if isinstance(v, float) else np.nan for v in column], dtype=np.float64)
+                selected &= np.isclose(numeric, value)
+        return np.flatnonzero(selected)
+
     @deprecated(version='1.0.0', reason="use method which follows pep8")
     def getData(self, name, case=0, time=None):
         return self.get_data(name, case, time)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_raw import write_raw
+from modules.raw_cache import RawCache
+from modules.spice import Spice
+
+files = {
+    'transient_f4': dict(trace_dtype=np.float32),
+    'transient_f8': dict(trace_dtype=np.float64),
+    'ac': dict(mode='AC', trace_dtype=np.complex128),
+}
+
+
+@pytest.mark.parametrize('kind', list(files))
+def test_loaded_y_raw_matches_parse(tmp_path, kind):
+    path = write_raw(tmp_path / f'{kind}.raw', variable_num=4, point_num=200, step_num=2, **files[kind])
+    cache = RawCache(tmp_path / 'cache')
+    cache.store(Spice(path).parse())
+
+    loaded = cache.load(path)
+    reference = Spice(path).parse()
+    assert loaded.y_raw.shape == reference.y_raw.shape
+    assert loaded.y_raw.dtype == reference.y_raw.dtype
+    np.testing.assert_array_equal(loaded.y_raw, reference.y_raw)
+    np.testing.assert_array_equal(loaded.x_raw, reference.x_raw)
+
+
+def test_old_format_entry_is_a_miss(tmp_path):
+    path = write_raw(tmp_path / 'old.raw', variable_num=3, point_num=50)
+    cache = RawCache(tmp_path / 'cache')
+    entry = cache.store(Spice(path).parse())
+    (entry / 'variable0.npy').unlink()
+    meta = (entry / 'meta.json').read_text().replace('"version": 2', '"version": 1')
+    (entry / 'meta.json').write_text(meta)
+    assert cache.load(path) is None
+    np.testing.assert_array_equal(cache.open(path).y_raw, Spice(path).parse().y_raw)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_raw import write_raw
+from modules.spice import Spice
+
+layouts = {
+    'default': dict(),
+    'lazy': dict(lazy=True),
+    'memory_map': dict(memory_map=True),
+    'column_major': dict(column_major=True),
+    'lazy_column_major': dict(lazy=True, column_major=True),
+}
+
+files = {
+    'transient_f4': dict(trace_dtype=np.float32),
+    'transient_f8': dict(trace_dtype=np.float64),
+    'ac': dict(mode='AC', trace_dtype=np.complex128),
+    'ascii': dict(file_type='Ascii'),
+}
+
+
+@pytest.fixture(params=list(files))
+def raw_file(request, tmp_path):
+    return write_raw(tmp_path / f'{request.param}.raw', variable_num=4, point_num=200, step_num=2,
+                     **files[request.param])
+
+
+@pytest.mark.parametrize('layout', list(layouts))
+def test_variable0_matches_row_major(raw_file, layout):
+    reference = Spice(raw_file).parse()
+    spice = Spice(raw_file).parse(**layouts[layout])
+    name = spice.variables[0]
+    for case in range(reference.case_count):
+        begin, end = reference._case_split_point[case], reference._case_split_point[case + 1]
+        expected = reference.y_raw[begin:end, 0]
+        data = spice.get_data(name, case)
+        assert data.dtype == expected.dtype
+        np.testing.assert_array_equal(data, expected)
+
+
+@pytest.mark.parametrize('layout', list(layouts))
+def test_traces_match_row_major(raw_file, layout):
+    reference = Spice(raw_file).parse()
+    spice = Spice(raw_file).parse(**layouts[layout])
+    for index, name in enumerate(spice.variables):
+        np.testing.assert_array_equal(spice.get_data(name, 1), reference.get_data(name, 1))